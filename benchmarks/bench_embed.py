@@ -0,0 +1,42 @@
+import argparse, os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import program
+from src.interpreter import FekInterpreter
+from src.vm import FekVM
+
+engines = {"tree": FekInterpreter, "vm": FekVM}
+
+snippet = """new func main(){
+    return price * qty + bonus!(name)
+}
+"""
+
+def bench_run(engine, count: int, repeat: int):
+    # one compiled program run with new inputs each time
+    compiled, inter, best = program.compile(snippet, "<bench>"), engine("<bench>"), float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(count):
+            compiled.run(inter, price=i, qty=2, name="fek", bonus=len)
+        best = min(best, time.perf_counter()-start)
+    return count/best
+
+def bench_interpret(engine, count: int, repeat: int):
+    # the same, lexing and parsing the inputs into the source every time
+    inter, best = engine("<bench>"), float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(count):
+            inter.reset()
+            inter.interpret(f'def price = {i}\ndef qty = 2\ndef name = "fek"\nnew func bonus(s){{ return 3 }}\n'+snippet)
+        best = min(best, time.perf_counter()-start)
+    return count/best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding benchmark, Program.run against interpret")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for name, engine in engines.items():
+        print(f"{name:<6}{bench_run(engine, args.count, args.repeat):>12,.0f} runs/s Program.run")
+        print(f"{name:<6}{bench_interpret(engine, args.count, args.repeat):>12,.0f} runs/s interpret")
@@ -0,0 +1,27 @@
+import argparse, os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.interpreter import FekInterpreter
+from src.vm import FekVM
+
+engines = {"tree": FekInterpreter, "vm": FekVM}
+
+def bench(engine, count: int, repeat: int, source: str=None):
+    # interpreters created per second, optionally running a tiny program on each
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            inter = engine("<bench>")
+            if source is not None:
+                inter.interpret(source)
+        best = min(best, time.perf_counter()-start)
+    return count/best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interpreter instantiation benchmark")
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for name, engine in engines.items():
+        print(f"{name:<6}{bench(engine, args.count, args.repeat):>14,.0f} interpreters/s")
+        print(f"{name:<6}{bench(engine, args.count//10, args.repeat, 'def x = 1 + 2'):>14,.0f} interpreters/s running 'def x = 1 + 2'")
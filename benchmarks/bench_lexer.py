@@ -0,0 +1,44 @@
+import argparse, os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.lexer import Lexer
+
+def generate(size: int):
+    # a mix of everything the scanner handles: code, strings, numbers and both comment styles
+    chunk = (
+        "// helper {i}\n"
+        "new func helper_{i}(a, b){{\n"
+        "    def total = a + b * {i} - 1.5 / 2\n"
+        "    println!(\"value \\t\" + total)\n"
+        "    /* block comment spanning\n       two lines */\n"
+        "    return total\n"
+        "}}\n"
+        "[desc_{i}:\"generated directive\"]\n"
+    )
+    parts, length, i = [], 0, 0
+    while length < size:
+        part = chunk.format(i=i)
+        parts.append(part)
+        length += len(part)
+        i += 1
+    return "".join(parts)
+
+def bench(source: str, repeat: int):
+    lexer = Lexer("<bench>")
+    best, tokens = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = len(lexer.lex(source).tokens)
+        best = min(best, time.perf_counter()-start)
+    return best, tokens
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lexer throughput benchmark")
+    parser.add_argument("--size", type=float, default=4, help="input size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    source = generate(int(args.size*1024*1024))
+    mb = len(source.encode())/(1024*1024)
+    best, tokens = bench(source, args.repeat)
+    print(f"input:  {mb:.2f} MB, {tokens} tokens")
+    print(f"best:   {best:.3f} s")
+    print(f"speed:  {mb/best:.2f} MB/s, {tokens/best:,.0f} tokens/s")
@@ -0,0 +1,53 @@
+import argparse, gc, os, sys, tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.lexer import Lexer
+from src.parser import Parser
+from src.nodes import Node
+
+def generate(functions: int):
+    parts = []
+    for i in range(functions):
+        parts.append(
+            f"[desc_{i}:\"helper number {i}\"]\n"
+            f"new func helper_{i}(a, b){{\n"
+            f"    println!(\"value: \" + (a * {i} - b / 2))\n"
+            f"    return helper_{max(i-1, 0)}!(a + 1, -b)\n"
+            "}\n"
+        )
+    return "".join(parts)
+
+def count(node):
+    if isinstance(node, (list, tuple)):
+        return sum(map(count, node))
+    if not isinstance(node, Node):
+        return 0
+    total = 1
+    for cls in type(node).__mro__:
+        for attr in getattr(cls, "__slots__", ()):
+            total += count(getattr(node, attr, None))
+    for value in getattr(node, "__dict__", {}).values():
+        total += count(value)
+    return total
+
+def measure(source: str):
+    gc.collect()
+    tracemalloc.start()
+    tokens = Lexer("<bench>").lex(source)
+    token_bytes = tracemalloc.get_traced_memory()[0]
+    tree = Parser("<bench>").parse(tokens)
+    del tokens
+    gc.collect()
+    tree_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, token_bytes, tree_bytes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Token and AST memory benchmark")
+    parser.add_argument("--functions", type=int, default=20000)
+    args = parser.parse_args()
+    source = generate(args.functions)
+    tree, token_bytes, tree_bytes = measure(source)
+    nodes = count(list(tree))
+    print(f"source: {len(source)/2**20:.2f} MB")
+    print(f"tokens: {token_bytes/2**20:.2f} MB (including source)")
+    print(f"ast:    {nodes} nodes, {tree_bytes/2**20:.2f} MB, {tree_bytes/nodes:.0f} bytes/node")
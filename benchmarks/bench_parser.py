@@ -0,0 +1,48 @@
+import argparse, os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.lexer import Lexer
+from src.parser import Parser
+
+def generate(size: int):
+    # statements of every kind, with long operator chains, calls and nested parentheses
+    chunk = (
+        "[memo]\n"
+        "new func helper_{i}(a, b, c){{\n"
+        "    def total = a + b * {i} - (c - 1.5) / 2 + -a * (b + (c * (a - 1)))\n"
+        "    def name = \"helper\" + {i} + a.data\n"
+        "    return helper_{j}!(total, b * 2, c) + println!(name) + 3\n"
+        "}}\n"
+        "[desc_{i}:\"generated directive\"]\n"
+        "def value_{i} = helper_{i}!(1 + 2 * 3, {i} / 4 - 5, (6 + 7) * 8) - {i}\n"
+    )
+    parts, length, i = [], 0, 0
+    while length < size:
+        part = chunk.format(i=i, j=max(i-1, 0))
+        parts.append(part)
+        length += len(part)
+        i += 1
+    return "".join(parts)
+
+def bench(source: str, repeat: int):
+    # parsing only, the tokens are lexed up front
+    lexer, parser = Lexer("<bench>"), Parser("<bench>")
+    tokens = lexer.lex(source).tokens
+    best = float("inf")
+    for _ in range(repeat):
+        tree = lexer.lex(source)
+        start = time.perf_counter()
+        parser.parse(tree)
+        best = min(best, time.perf_counter()-start)
+    return best, len(tokens)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parser throughput benchmark")
+    parser.add_argument("--size", type=float, default=4, help="input size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    source = generate(int(args.size*1024*1024))
+    mb = len(source.encode())/(1024*1024)
+    best, tokens = bench(source, args.repeat)
+    print(f"input:  {mb:.2f} MB, {tokens} tokens")
+    print(f"best:   {best:.3f} s")
+    print(f"speed:  {mb/best:.2f} MB/s, {tokens/best:,.0f} tokens/s")
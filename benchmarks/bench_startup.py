@@ -0,0 +1,49 @@
+import argparse, os, re, subprocess, sys, tempfile
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules a plain run must not pay for, they are loaded on demand
+lazy = ("colorama", "textwrap", "inspect", "typing", "concurrent.futures", "xml.etree", "json", "threading",
+        "pickle", "hashlib", "signal", "glob", "src.vm", "src.batch")
+cached = ("pickle", "hashlib") # what a default run, through the program cache, does pay for
+line = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+def measure(script: str, env: dict, *flags):
+    # one cold start under -X importtime: {module: (self us, cumulative us, depth)}
+    run = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(root, "main.py"), *flags, script],
+        capture_output=True, text=True, env=env, cwd=root
+    )
+    modules = {}
+    for m in line.finditer(run.stderr):
+        modules[m[4]] = int(m[1]), int(m[2]), (len(m[3])-1)//2
+    return modules
+
+def total(modules: dict):
+    return sum(cumulative for _, cumulative, depth in modules.values() if depth == 0)/1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start benchmark, -X importtime of main.py on a trivial script")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=50.0, help="milliseconds of imports allowed")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "hello.fek")
+        with open(script, "w") as file:
+            file.write("new func main() {\n    println!(\"hello\")\n}\n")
+        # cached bytecode like an installed copy, kept out of the tree, and a program cache of its own
+        env = {**os.environ, "PYTHONPYCACHEPREFIX": os.path.join(tmp, "pycache"), "FEK_CACHE_DIR": os.path.join(tmp, "cache")}
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        failed = False
+        for title, flags, allowed in (("--no-cache", ("--no-cache",), ()), ("default", (), cached)):
+            measure(script, env, *flags) # warms both caches
+            best = min((measure(script, env, *flags) for _ in range(args.repeat)), key=total)
+            print(f"[{title}]")
+            for name, (own, cumulative, depth) in sorted(best.items(), key=lambda i: -i[1][0])[:args.top]:
+                print(f"{name:<32}{own/1000:>8.2f} ms self{cumulative/1000:>8.2f} ms cumulative")
+            print(f"{'imports':<32}{total(best):>8.2f} ms (budget {args.budget:.2f} ms)")
+            loaded = [name for name in lazy if name in best and name not in allowed]
+            if loaded:
+                print(f"eagerly imported: {', '.join(loaded)}")
+            failed = failed or bool(loaded) or total(best) > args.budget
+    exit(1 if failed else 0)
@@ -0,0 +1,159 @@
+import argparse, contextlib, gc, io, json, os, platform, sys, time, tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import FekInterpreter
+from src.vm import FekVM
+
+engines = {"tree": FekInterpreter, "vm": FekVM}
+
+def arithmetic(size: int):
+    # long operator chains, evaluated on the global scope
+    lines = []
+    for i in range(size):
+        chain = " + ".join(f"{j} * {i+1} - {j} / 2" for j in range(1, 11))
+        lines.append(f"def v_{i} = {chain}\n")
+    return "".join(lines)
+
+def calls(size: int):
+    # a chain of functions, each calling the next, kept under the default recursion limit
+    depth = min(size, 400)
+    parts = [f"new func f_{i}(n){{\n    return f_{i+1}!(n + 1)\n}}\n" for i in range(depth)]
+    parts.append(f"new func f_{depth}(n){{\n    return n\n}}\n")
+    parts.append("".join(f"def r_{i} = f_0!({i})\n" for i in range(max(size//depth, 1))))
+    return "".join(parts)
+
+def functions(size: int):
+    # many small functions, each defined and called once
+    return "".join(
+        f"new func small_{i}(a, b){{\n    def c = a * b\n    return c + {i}\n}}\n"
+        f"def s_{i} = small_{i}!({i}, 2)\n"
+        for i in range(size)
+    )
+
+def strings(size: int):
+    # one large concatenation built over many statements
+    parts = ['def s_0 = ""\n']
+    for i in range(1, size):
+        parts.append(f'def s_{i} = s_{i-1} + "chunk {i} " + {i}\n')
+    return "".join(parts)
+
+def comments(size: int):
+    # mostly comments, both styles, around a little code
+    return "".join(
+        f"// line comment {i} " + "x"*60 + "\n"
+        f"/* block comment {i}\n   spanning lines */\n"
+        f"def c_{i} = {i}\n"
+        for i in range(size)
+    )
+
+workloads = {
+    "arithmetic": arithmetic,
+    "calls": calls,
+    "functions": functions,
+    "strings": strings,
+    "comments": comments,
+}
+
+def phases(source: str, engine):
+    # the three stages, each given fresh input so repeats do not share state
+    def lex():
+        return Lexer("<bench>").lex(source)
+    def parse():
+        tokens = lex()
+        return lambda: Parser("<bench>").parse(tokens)
+    def interpret():
+        tree = Parser("<bench>").parse(lex())
+        inter = engine("<bench>")
+        inter.source = source
+        return lambda: inter.execute(tree)
+    return {"lex": lambda: lex, "parse": parse, "interpret": interpret}
+
+def measure(setup, repeat: int):
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            run = setup()
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter()-start)
+        run = setup()
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak
+
+def run_suite(names, size: int, repeat: int, engine: str):
+    results = {}
+    for name in names:
+        source = workloads[name](size)
+        tokens = len(Lexer("<bench>").lex(source).tokens)
+        for phase, setup in phases(source, engines[engine]).items():
+            best, peak = measure(setup, repeat)
+            unit, count = ("tokens", tokens) if phase != "interpret" else ("runs", 1)
+            results[f"{name}.{phase}"] = {
+                "seconds": best,
+                "ops_per_sec": count/best,
+                "unit": unit,
+                "peak_bytes": peak,
+            }
+            print(f"{name+'.'+phase:<24}{best*1000:>10.2f} ms{count/best:>16,.0f} {unit}/s{peak/1024:>12,.0f} KB peak")
+    return results
+
+def compare(old: dict, new: dict, threshold: float):
+    # a benchmark regresses when its time or peak memory grows by more than threshold percent
+    regressions = 0
+    print(f"{'benchmark':<24}{'old ms':>10}{'new ms':>10}{'time':>9}{'memory':>9}")
+    for name, a in old["results"].items():
+        b = new["results"].get(name)
+        if b is None:
+            continue
+        time_change = (b["seconds"]/a["seconds"]-1)*100
+        memory_change = (b["peak_bytes"]/max(a["peak_bytes"], 1)-1)*100
+        flag = ""
+        if time_change > threshold or memory_change > threshold:
+            flag, regressions = "  REGRESSION", regressions+1
+        print(
+            f"{name:<24}{a['seconds']*1000:>10.2f}{b['seconds']*1000:>10.2f}"
+            f"{time_change:>+8.1f}%{memory_change:>+8.1f}%{flag}"
+        )
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FekLang benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the workloads and store the results as JSON")
+    run.add_argument("workloads", nargs="*", help=f"any of {', '.join(workloads)}, all by default")
+    run.add_argument("--size", type=int, default=2000, help="statements per workload")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--engine", choices=engines, default="tree")
+    run.add_argument("--output", "-o", help="JSON file for the results")
+    cmp = commands.add_parser("compare", help="compare two JSON results")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=10, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        for name in args.workloads:
+            if name not in workloads:
+                parser.error(f"unknown workload: {name}")
+        results = run_suite(args.workloads or list(workloads), args.size, args.repeat, args.engine)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump({
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "engine": args.engine,
+                    "size": args.size,
+                    "repeat": args.repeat,
+                    "results": results,
+                }, file, indent=2)
+    else:
+        with open(args.old) as old, open(args.new) as new:
+            regressions = compare(json.load(old), json.load(new), args.threshold)
+        print(f"\n{regressions} regression(s) above {args.threshold:g}%")
+        exit(1 if regressions else 0)
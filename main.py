@@ -1,39 +1,108 @@
-from src.interpreter import FekInterpreter
 from src.error import FekException
-import sys, os
+from src.cache import ProgramCache
+from src.output import Output
+from src import engines
+import sys, os, time
 argv = sys.argv[1:]
+options = dict(a.lstrip("-").partition("=")[::2] for a in argv if a.startswith("-"))
+argv = [a for a in argv if not a.startswith("-")]
+if options.get("engine", "tree") not in engines.names:
+    print(f"Unknown engine: {options['engine']} (expected {', '.join(engines.names)})")
+    exit(1)
+engine = engines.engine(options.get("engine", "tree"))
+cache = ProgramCache(options.get("cache-dir") or None)
+
+if argv[:1] == ["clear-cache"]:
+    print(f"Removed {cache.clear()} cached program(s) from '{cache.directory}'")
+    exit(0)
+
+if argv[:1] == ["run-many"] and __name__ == "__main__":
+    import json
+    from src.batch import collect, junit, run_many, summary
+    paths = [p for pattern in argv[1:] for p in collect(pattern)]
+    start = time.perf_counter()
+    results = run_many(
+        paths, options,
+        int(options["workers"]) if options.get("workers") else None,
+        float(options["timeout"]) if options.get("timeout") else None
+    )
+    report = summary(results, time.perf_counter()-start)
+    text = junit(report) if options.get("format") == "junit" else json.dumps(report, indent=2)
+    if options.get("output"):
+        with open(options["output"], "w") as file:
+            file.write(text)
+    else:
+        print(text)
+    sys.stderr.write(
+        f"[{report['total']} script(s): {report['ok']} ok, {report['failed']} failed, "
+        f"{report['timeout']} timed out, {report['crashed']} crashed in {report['seconds']:.2f}s]\n"
+    )
+    exit(0 if report["ok"] == report["total"] else 1)
 
 if argv:
-    inter = FekInterpreter(f"{argv[0]}")
+    inter = engine(f"{argv[0]}", Output(buffered="unbuffered" not in options))
     path = argv[0]
+    if "no-cache" not in options:
+        inter.cache = cache
 else:
-    inter = FekInterpreter("<stdin>")
+    inter = engine("<stdin>", Output(buffered=False))
     path = None
+output = inter.output
+engines.configure(inter, options)
+profiler = None
+if "profile" in options and path is not None:
+    if options.get("engine", "tree") != "tree":
+        print("--profile needs the tree engine")
+        exit(1)
+    from src.profiler import Profiler
+    profiler = Profiler(inter).install()
 
-def execute(string: str):
-    return inter.interpret(string)
+def execute(code):
+    if profiler is None:
+        return run(code)
+    try:
+        with profiler:
+            return run(code)
+    finally:
+        base = options["profile"] or os.path.splitext(path)[0]+".profile"
+        profiler.write(base)
+        sys.stderr.write(f"[Profile written to '{base}.txt' and '{base}.folded']\n")
+
+def run(code):
+    if isinstance(code, str):
+        return inter.interpret(code)
+    with code:
+        return inter.interpret_stream(code)
 
 if __name__ == "__main__":
     if path is not None:
         if os.path.exists(path):
             try:
                 try:
-                    code = open(path).read()
+                    code = open(path) if "stream" in options else open(path).read()
                 except FileNotFoundError:
                     print("File not found")
                     exit(1)
             except PermissionError:
                 print("Access denied")
                 exit(1)
-            if code and not code.isspace():
+            if not isinstance(code, str) or code and not code.isspace():
                 try:
-                    print(f"[Running '{path}']\n")
+                    output.write(f"[Running '{path}']\n\n")
+                    output.flush() # parser warnings go to stderr right after this
                     code = execute(code)
-                    print(f"\n[Exit with code: {code}]")
+                    if "memo-stats" in options:
+                        output.write("".join(f"[memo] {memo}\n" for memo in inter.memos.values()))
+                    if "memory-stats" in options:
+                        output.write(f"[heap] {inter.heap}\n")
+                    if "budget-stats" in options:
+                        output.write(f"[budget] {inter.budget}\n")
+                    output.write(f"\n[Exit with code: {code}]\n")
+                    output.flush()
                     exit(code)
                 except FekException as e:
-                    print(e)
-                    print(f"[Exit with code: 1]")
+                    output.write(f"{e}\n[Exit with code: 1]\n")
+                    output.flush()
                     exit(1)
                 except KeyboardInterrupt:
                     exit(0)
@@ -41,12 +110,24 @@ if __name__ == "__main__":
         else:
             print("File not found")
             exit(1)
+    from src.session import Session
+    session, lines = Session(inter), []
     while True:
         try:
-            code = input("=> ")
+            lines.append(input(".. " if lines else "=> "))
+            code = "\n".join(lines)
+            if not session.complete(code):
+                continue
+            lines.clear()
             if code and not code.isspace():
-                execute(code)
+                session.run(code)
         except FekException as e:
-            print(e)
-        except (KeyboardInterrupt, EOFError):
+            lines.clear()
+            output.write(f"{e}\n")
+        except KeyboardInterrupt:
+            if not lines:
+                break
+            lines.clear() # drop the unfinished input
+            output.write("\n")
+        except EOFError:
             break
\ No newline at end of file
@@ -0,0 +1,100 @@
+import contextlib, glob, io, os, signal, time
+from src.cache import ProgramCache
+from src.engines import configure
+from src.error import FekException
+from src.interpreter import FekInterpreter
+from src.output import Output
+from src.vm import FekVM
+
+engines = {
+    "tree": FekInterpreter,
+    "vm": FekVM,
+}
+
+def collect(pattern: str):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*.fek")
+    return sorted(glob.glob(pattern, recursive=True))
+
+class ScriptTimeout(Exception):
+    pass
+
+def timeout(*_):
+    raise ScriptTimeout()
+
+worker = None # the warmed interpreter of this worker process
+
+def start_worker(options: dict):
+    global worker
+    worker = configure(engines[options.get("engine", "tree")]("<worker>", Output(io.StringIO())), options)
+    if "no-cache" not in options:
+        worker.cache = ProgramCache(options.get("cache-dir") or None)
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, timeout)
+
+def run_script(path: str, seconds: float=None):
+    worker.reset(path)
+    worker.output.sink = stdout = io.StringIO()
+    result = {"file": path, "status": "ok", "exit_code": 0, "error": None}
+    stderr = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with open(path) as file:
+            source = file.read()
+        with contextlib.redirect_stderr(stderr):
+            if seconds and hasattr(signal, "setitimer"):
+                signal.setitimer(signal.ITIMER_REAL, seconds)
+            try:
+                code = worker.interpret(source) if source and not source.isspace() else 0
+            finally:
+                if seconds and hasattr(signal, "setitimer"):
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+        result["exit_code"] = code if isinstance(code, int) else 0
+        result["status"] = "ok" if result["exit_code"] == 0 else "failed"
+    except FekException as e:
+        result.update(status="failed", exit_code=1, error=e.diagnostic().as_dict())
+    except ScriptTimeout:
+        worker.output.flush()
+        result.update(status="timeout", exit_code=1, error={"message": f"timed out after {seconds}s"})
+    except Exception as e:
+        import traceback
+        result.update(status="crashed", exit_code=1, error={"message": "".join(traceback.format_exception(e))})
+    result["seconds"] = time.perf_counter()-start
+    result["memory"] = worker.heap.stats()
+    result["budget"] = worker.budget.stats()
+    result["stdout"] = stdout.getvalue()
+    if stderr.getvalue():
+        result["stderr"] = stderr.getvalue()
+    return result
+
+def run_many(paths: list, options: dict, workers: int=None, seconds: float=None):
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(paths)//(workers*8))
+    with ProcessPoolExecutor(workers, initializer=start_worker, initargs=(options,)) as pool:
+        return list(pool.map(run_script, paths, [seconds]*len(paths), chunksize=chunk))
+
+def summary(results: list, seconds: float):
+    counts = {status: 0 for status in ("ok", "failed", "timeout", "crashed")}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"total": len(results), **counts, "seconds": seconds, "results": results}
+
+def junit(report: dict):
+    import json
+    from xml.etree import ElementTree
+    suite = ElementTree.Element(
+        "testsuite", name="feklang", tests=str(report["total"]),
+        failures=str(report["failed"]), errors=str(report["timeout"]+report["crashed"]),
+        time=f"{report['seconds']:.3f}"
+    )
+    for result in report["results"]:
+        case = ElementTree.SubElement(
+            suite, "testcase", classname="feklang", name=result["file"], time=f"{result['seconds']:.3f}"
+        )
+        if result["status"] != "ok":
+            error = result["error"] or {"message": f"exit code {result['exit_code']}"}
+            kind = "failure" if result["status"] == "failed" else "error"
+            ElementTree.SubElement(case, kind, message=error["message"].split("\n")[0]).text = json.dumps(error, indent=2)
+        ElementTree.SubElement(case, "system-out").text = result["stdout"]
+    return ElementTree.tostring(suite, encoding="unicode")
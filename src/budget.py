@@ -0,0 +1,40 @@
+from time import perf_counter
+
+POLL = 256 # steps between two looks at the clock
+
+class Budget:
+    # how far one run may go: fuel counts evaluated nodes, or executed instructions on the vm,
+    # seconds the wall clock. None for no limit, every run starts again with all of it
+
+    def __init__(self, fuel: int=None, seconds: float=None) -> None:
+        self.fuel, self.seconds = fuel, seconds
+        self.start()
+
+    @property
+    def limited(self):
+        return self.fuel is not None or self.seconds is not None
+
+    def start(self):
+        self.deadline = None if self.seconds is None else perf_counter()+self.seconds
+        self.poll, self.steps = POLL, 0
+
+    def spend(self, steps: int):
+        # None while some is left, else the error and the message: the caller raises
+        self.steps += steps
+        if self.fuel is not None and self.steps > self.fuel:
+            return "FuelError", f"Ran out of fuel after {self.fuel} steps"
+        if self.deadline is not None:
+            self.poll -= steps
+            if self.poll <= 0:
+                self.poll = POLL
+                if perf_counter() > self.deadline:
+                    return "TimeoutError", f"Exceeded the deadline of {self.seconds} s"
+        return None
+
+    def stats(self):
+        return {"steps": self.steps, "fuel": self.fuel, "seconds": self.seconds}
+
+    def __repr__(self) -> str:
+        fuel = "no fuel limit" if self.fuel is None else f"fuel {self.fuel}"
+        seconds = "no deadline" if self.seconds is None else f"deadline {self.seconds} s"
+        return f"{self.steps} steps, {fuel}, {seconds}"
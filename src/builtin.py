@@ -1,106 +1,184 @@
-import sys
-from src.fek import FekEmpty, FekStruct, FekVariable, RaiseAnError
+import operator
+from types import MappingProxyType
+from src.fek import FekEmpty, FekStruct, FekSymbol, FekVariable, RaiseAnError
 from src.memory import ScopeTable
 
+# concatenations shorter than this stay plain strings
+ROPE_THRESHOLD = 256
+
+class Rope:
+    # a string built by repeated +, its pieces are joined only once the text is needed.
+    # Ropes grown from the same one share the parts list, the first to append keeps it
+    __slots__ = ("parts", "count", "length", "text")
+
+    def __init__(self, parts: list, length: int) -> None:
+        self.parts, self.count, self.length = parts, len(parts), length
+        self.text = None
+
+    def __str__(self):
+        if self.text is None:
+            parts = self.parts if len(self.parts) == self.count else self.parts[:self.count]
+            self.text = "".join(parts)
+        return self.text
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, o):
+        return str(self) == (str(o) if isinstance(o, Rope) else o)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def append(self, text: str):
+        parts = self.parts
+        if len(parts) != self.count:
+            parts = parts[:self.count]
+        parts.append(text)
+        return Rope(parts, self.length+len(text))
+
+def type_name(value):
+    # ints, floats, strings and NULL stay native, everything else carries its struct name
+    t = type(value)
+    if t is int or t is float:
+        return "integer"
+    if t is str or t is Rope:
+        return "string"
+    if value is None:
+        return "NULL"
+    if isinstance(value, ScopeTable):
+        return value.level
+    if isinstance(value, FekSymbol):
+        return value.name
+    return "builtin-method"
+
+def view(value):
+    t = type(value)
+    if t is str:
+        return value
+    if t is int or t is float or t is Rope:
+        return str(value)
+    if value is None:
+        return "NULL"
+    if isinstance(value, ScopeTable):
+        return value.get("__view__")(value)
+    if isinstance(value, FekSymbol):
+        return value["__view__"](value.scope)
+    return "<builtin-method>"
+
+def unbox(value):
+    if isinstance(value, ScopeTable) and value.level in ("integer", "string", "NULL"):
+        return value.get("data")
+    return value
+
+def boxed(method):
+    # adapt a native method to the ScopeTable calling convention of struct instances
+    return lambda this, *o: method(unbox(this), *map(unbox, o))
+
 def get_attribute(this: ScopeTable, attr: ScopeTable):
     if attr.level != "string":
         return RaiseAnError(
             "TypeError", "attribute name should be string object"
         )
     return this.get(attr.get("data"))
+base_methods = {
+    "__init__": lambda _: None,
+    "__view__": lambda this: f"<{type_name(this)}>",
+    "__add__": lambda this, o: 
+        RaiseAnError(
+            "TypeError",
+            f"Unsupported operand(+) between <{type_name(this)}> and <{type_name(o)}>"
+        ),
+    "__sub__": lambda this, o: 
+        RaiseAnError(
+            "TypeError",
+            f"Unsupported operand(-) between <{type_name(this)}> and <{type_name(o)}>"
+        ),
+    "__mult__": lambda this, o: 
+        RaiseAnError(
+            "TypeError",
+            f"Unsupported operand(*) between <{type_name(this)}> and <{type_name(o)}>"
+        ),
+    "__div__": lambda this, o: 
+        RaiseAnError(
+            "TypeError",
+            f"Unsupported operand(/) between <{type_name(this)}> and <{type_name(o)}>"
+        ),
+    "__call__": lambda this: 
+        RaiseAnError(
+            "TypeError",
+            f"<{type_name(this)}> is not Callable"
+        ),
+    "__positive__": lambda this: 
+        RaiseAnError(
+            "TypeError",
+            f"Illegal unary operation(+) for <{type_name(this)}>"
+        ),
+    "__negative__": lambda this: 
+        RaiseAnError(
+            "TypeError",
+            f"Illegal unary operation(-) for <{type_name(this)}>"
+        ),
+}
 Base = FekStruct(
     ScopeTable(
         'BaseObject',
         memory={
-            "__init__": lambda _: None,
-            "__view__": lambda this: f"<{this.level}>",
-            "__add__": lambda this, o: 
-                RaiseAnError(
-                    "TypeError",
-                    f"Unsupported operand(+) between <{this.level}> and <{o.level}>"
-                ),
-            "__sub__": lambda this, o: 
-                RaiseAnError(
-                    "TypeError",
-                    f"Unsupported operand(-) between <{this.level}> and <{o.level}>"
-                ),
-            "__mult__": lambda this, o: 
-                RaiseAnError(
-                    "TypeError",
-                    f"Unsupported operand(*) between <{this.level}> and <{o.level}>"
-                ),
-            "__div__": lambda this, o: 
-                RaiseAnError(
-                    "TypeError",
-                    f"Unsupported operand(/) between <{this.level}> and <{o.level}>"
-                ),
-            "__call__": lambda this: 
-                RaiseAnError(
-                    "TypeError",
-                    f"<{this.level}> is not Callable"
-                ),
-            "__positive__": lambda this: 
-                RaiseAnError(
-                    "TypeError",
-                    f"Illegal unary operation(+) for <{this.level}>"
-                ),
-            "__negative__": lambda this: 
-                RaiseAnError(
-                    "TypeError",
-                    f"Illegal unary operation(-) for <{this.level}>"
-                ),
+            **base_methods,
             "__getattr__": get_attribute
         }
     )
 )
 
-def int__add__(this: ScopeTable, o: ScopeTable):
-    if o.level != "integer":
+def int__add__(this, o):
+    if type(o) is not int and type(o) is not float:
         return RaiseAnError(
                 "TypeError",
-                f"Unsupported operand(+) between {this.level} and {o.level}"
+                f"Unsupported operand(+) between integer and {type_name(o)}"
             )
-    return this.get("data")+o.get("data")
-def int__sub__(this: ScopeTable, o: ScopeTable):
-    if o.level != "integer":
+    return this+o
+def int__sub__(this, o):
+    if type(o) is not int and type(o) is not float:
         return RaiseAnError(
                 "TypeError",
-                f"Unsupported operand(+) between {this.level} and {o.level}"
+                f"Unsupported operand(+) between integer and {type_name(o)}"
             )
-    return this.get("data")-o.get("data")
-def int__mult__(this: ScopeTable, o: ScopeTable):
-    if o.level != "integer":
+    return this-o
+def int__mult__(this, o):
+    if type(o) is not int and type(o) is not float:
         return RaiseAnError(
                 "TypeError",
-                f"Unsupported operand(+) between {this.level} and {o.level}"
+                f"Unsupported operand(+) between integer and {type_name(o)}"
             )
-    return this.get("data")*o.get("data")
-def int__div__(this: ScopeTable, o: ScopeTable):
-    if o.level != "integer":
+    return this*o
+def int__div__(this, o):
+    if type(o) is not int and type(o) is not float:
         return RaiseAnError(
                 "TypeError",
-                f"Unsupported operand(+) between {this.level} and {o.level}"
+                f"Unsupported operand(+) between integer and {type_name(o)}"
             )
-    right = o.get("data")
-    if right == 0:
+    if o == 0:
         return RaiseAnError(
             "MathError",
-            f"Can't divide by zero\nContext:\n\tleft:{this.get('data')}\n\tright:{right}"
+            f"Can't divide by zero\nContext:\n\tleft:{this}\n\tright:{o}"
         )
-    return this.get("data")/o.get("data")
+    return this/o
 
+integer_methods = {
+    "__view__": str,
+    "__add__": int__add__,
+    "__sub__": int__sub__,
+    "__mult__": int__mult__,
+    "__div__": int__div__,
+    "__positive__": lambda this: +this,
+    "__negative__": lambda this: -this,
+}
 IntegerObject = FekStruct(
     ScopeTable(
         "integer",
         memory={
             "__init__": lambda this, o: this.put("data", o),
-            "__view__": lambda this: str(this.get("data")),
-            "__add__": int__add__,
-            "__sub__": int__sub__,
-            "__mult__": int__mult__,
-            "__div__": int__div__,
-            "__positive__": lambda this: +this.get("data"),
-            "__negative__": lambda this: -this.get("data"),
+            **{k: boxed(v) for k, v in integer_methods.items()},
         }
     ),
     inherite=Base
@@ -122,23 +200,31 @@ FunctionObject = FekStruct(
     inherite=Base
 )
 
-def string__add__(this: ScopeTable, o: ScopeTable):
-    return this.get("data")+o.get("__view__")(o)
-def string__mult__(this: ScopeTable, o: ScopeTable):
-    if o.level != "integer":
+def string__add__(this, o):
+    o = view(o)
+    if type(this) is Rope:
+        return this.append(o)
+    if len(this)+len(o) < ROPE_THRESHOLD:
+        return this+o
+    return Rope([this, o], len(this)+len(o))
+def string__mult__(this, o):
+    if type(o) is not int:
         return RaiseAnError(
                 "TypeError",
-                f"Unsupported operand(*) between {this.level} and {o.level}"
+                f"Unsupported operand(*) between string and {type_name(o)}"
             )
-    return this.get("data")*o.get("data")
+    return str(this)*o
+string_methods = {
+    "__view__": str,
+    "__add__": string__add__,
+    "__mult__": string__mult__,
+}
 StringObject = FekStruct(
     ScopeTable(
         'string',
         memory={
             "__init__": lambda this, o: this.put("data", str(o)),
-            "__view__": lambda this: this.get("data"),
-            "__add__": string__add__,
-            "__mult__": string__mult__,
+            **{k: boxed(v) for k, v in string_methods.items()},
         }
     ),
     inherite=Base
@@ -155,34 +241,69 @@ NullObject = FekStruct(
     inherite=Base
 )
 
-def println(string: str):
-    if isinstance(string, FekEmpty):
-        return ("string",) # give the interpreter the argument
-    if not isinstance(string, (int, str)):
-        string = string['__view__'](string.scope) if isinstance(string, FekStruct) else '<builtin-method>'
-    return sys.stdout.write(str(string)+"\n")
-
-def readln(string: str):
-    if isinstance(string, FekEmpty):
-        return ("string",)
-    if not isinstance(string, (int, str)):
-        string = string['__view__'](string.scope) if isinstance(string, FekStruct) else '<builtin-method>'
-    return input(string)
-
-println_method = FekVariable(
-    "println", println
-)
-readln_method = FekVariable(
-    "readln", readln
-)
+# per-type method tables for unboxed values, shared by every value of that type
+methods = {
+    int: {**base_methods, **integer_methods},
+    float: {**base_methods, **integer_methods},
+    str: {**base_methods, **string_methods},
+    Rope: {**base_methods, **string_methods},
+    type(None): {**base_methods, "__view__": lambda _: "NULL"},
+}
 
-def setup():
-    return (
+# operand type pairs whose operator needs none of the checks of the generic method
+specialized = {
+    (int, int, "__add__"): operator.add,
+    (int, int, "__sub__"): operator.sub,
+    (int, int, "__mult__"): operator.mul,
+    (float, float, "__add__"): operator.add,
+    (float, float, "__sub__"): operator.sub,
+    (float, float, "__mult__"): operator.mul,
+    (int, float, "__add__"): operator.add,
+    (float, int, "__add__"): operator.add,
+    (str, int, "__mult__"): operator.mul,
+}
+
+def resolve_operator(name: str, left: type, right: type):
+    # the implementation an inline cache keeps for (left, right), None for struct instances
+    table = methods.get(left)
+    if table is None:
+        return None
+    return specialized.get((left, right, name)) or table[name]
+
+def io_functions(output):
+    # println and readln write through the output of the interpreter they are installed in
+    def println(string: str):
+        if isinstance(string, FekEmpty):
+            return ("string",) # give the interpreter the argument
+        if type(string) is Rope:
+            string = str(string)
+        if not isinstance(string, (int, str)):
+            string = string['__view__'](string.scope) if isinstance(string, FekStruct) else '<builtin-method>'
+        return output.write(str(string)+"\n")
+    def readln(string: str):
+        if isinstance(string, FekEmpty):
+            return ("string",)
+        if type(string) is Rope:
+            string = str(string)
+        if not isinstance(string, (int, str)):
+            string = string['__view__'](string.scope) if isinstance(string, FekStruct) else '<builtin-method>'
+        return output.prompt(string)
+    return FekVariable("println", println), FekVariable("readln", readln)
+
+# the builtin environment, built once and shared read-only by every interpreter
+builtins = MappingProxyType({
+    **{obj.name: FekVariable(obj.name, obj) for obj in (
         Base,
         IntegerObject,
         StringObject,
         FunctionObject,
-        NullObject,
-        println_method,
-        readln_method
-    )
\ No newline at end of file
+    )},
+    "NULL": FekVariable("NULL", None),
+})
+
+def environment(output):
+    # a new global scope: the shared builtins plus the io functions bound to output
+    memory = dict(builtins)
+    for var in io_functions(output):
+        memory[var.name] = var
+    return memory
\ No newline at end of file
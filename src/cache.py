@@ -0,0 +1,69 @@
+import os
+
+# bump whenever the shape of the cached tree changes
+MAGIC = "fek-cache:6"
+
+def default_directory():
+    return os.environ.get("FEK_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "feklang"
+    )
+
+def private(st):
+    # unpickling runs code: only what this user owns and nobody else can write is trusted
+    if not hasattr(os, "getuid"):
+        return True
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+nofollow = getattr(os, "O_NOFOLLOW", 0)
+
+class ProgramCache:
+
+    def __init__(self, directory: str=None) -> None:
+        self.directory = directory or default_directory()
+
+    def path(self, name: str):
+        import hashlib # with pickle, only loaded once a program goes through the cache
+        key = hashlib.sha256(os.path.abspath(name).encode()).hexdigest()[:32]
+        return os.path.join(self.directory, key+".fekc")
+
+    def key(self, source: str):
+        import hashlib
+        return hashlib.sha256(f"{MAGIC}\0{source}".encode()).hexdigest()
+
+    def load(self, name: str, source: str):
+        import pickle
+        try:
+            if not private(os.stat(self.directory)):
+                return None
+            with os.fdopen(os.open(self.path(name), os.O_RDONLY | nofollow), "rb") as file:
+                if not private(os.fstat(file.fileno())):
+                    return None
+                magic, key, tree = pickle.load(file)
+        except Exception:
+            return None
+        if magic != MAGIC or key != self.key(source):
+            return None
+        return tree
+
+    def store(self, name: str, source: str, tree):
+        import pickle
+        path = self.path(name)
+        try:
+            os.makedirs(self.directory, 0o700, exist_ok=True)
+            if not private(os.stat(self.directory)):
+                return # a directory others can write to is never used
+            with os.fdopen(os.open(path+".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC | nofollow, 0o600), "wb") as file:
+                pickle.dump((MAGIC, self.key(source), tree), file, pickle.HIGHEST_PROTOCOL)
+            os.replace(path+".tmp", path)
+        except OSError:
+            pass
+
+    def clear(self):
+        count = 0
+        if not os.path.isdir(self.directory):
+            return count
+        for file in os.listdir(self.directory):
+            if file.endswith((".fekc", ".fekc.tmp")):
+                os.remove(os.path.join(self.directory, file))
+                count += 1
+        return count
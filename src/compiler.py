@@ -0,0 +1,192 @@
+from src.nodes import *
+from src.token import tok
+
+class op:
+    LOAD_CONST=0 # push constant
+    LOAD_FAST=1 # push frame slot, falls back to the global of the same name while unset
+    LOAD_GLOBAL=2 # push global
+    LOAD_NAME=3 # push variable by name, for directives that run in whatever frame calls exec
+    DEF_FAST=4 # def slot = pop
+    DEF_GLOBAL=5 # def name = pop
+    STORE_FAST=6 # slot = pop, no existence check
+    STORE_GLOBAL=7 # name = pop, no existence check
+    MAKE_FUNC=8 # push function
+    BINARY=9 # left + right
+    UNARY=10 # +value -value
+    GETATTR=11 # value.name
+    CALL=12 # callee!(args...)
+    RETURN=13
+    POP=14
+    EXEC=17 # run the code of each directive, exec key, key
+
+operators = {
+    "+": "__add__",
+    "-": "__sub__",
+    "*": "__mult__",
+    "/": "__div__",
+}
+
+expressions = (
+    LiteralValue, UnaryOp, getVariable, BinOp, ObjectCall, ExecuteSpecialComment
+)
+
+class Code:
+
+    def __init__(self, name: str, args: tuple=(), varnames: tuple=None) -> None:
+        self.name, self.args = name, args
+        self.ops, self.consts, self.nodes = [], [], []
+        self.index = {}
+        self.ret = None # first return statement, the rest of the body is unreachable
+        # frame layout, None for code running on the global scope
+        self.varnames = varnames
+        self.slots = None if varnames is None else {n: i for i, n in enumerate(varnames)}
+        self.as_global = None # main's body once more, for running it on the global scope
+        self.memo = False
+        self.last = None # the last node its body visits, see last, None for an empty body
+
+    def __repr__(self) -> str:
+        names = {v: k for k, v in vars(op).items() if not k.startswith("_")}
+        string = f"Code:{self.name}({', '.join(self.args)})"
+        for i in range(0, len(self.ops), 2):
+            string += f"\n\t{i:>4} {names[self.ops[i]]:<14}{self.ops[i+1]}"
+        return string
+
+    def emit(self, opcode: int, arg: int=0, node: Node=None):
+        self.ops += (opcode, arg)
+        self.nodes.append(node)
+
+    def const(self, value):
+        key = (type(value), value) if not isinstance(value, Code) else id(value)
+        if key not in self.index:
+            self.index[key] = len(self.consts)
+            self.consts.append(value)
+        return self.index[key]
+
+def last(node: Node):
+    # the node the tree walker visits last while evaluating node, errors of unary operators
+    # point there. After a call it is whatever the callee visited last, the call stands for it
+    while True:
+        t = type(node)
+        if t is UnaryOp:
+            node = node.value
+        elif t is BinOp:
+            node = node.left if node.op == tok.DOT else node.right
+        elif t is ReturnValue:
+            node = node.expr
+        elif t is NewVar:
+            node = node.value
+        elif t is ExecuteSpecialComment and node.targets and any(v is not None for v in node.targets):
+            node = [v for v in node.targets if v is not None][-1]
+        else:
+            return node
+
+def local_names(args, body):
+    # every name a function body can bind gets a slot: arguments first, then def and new func
+    names = list(args)
+    for node in body:
+        if isinstance(node, (NewVar, NewFunc)) and node.name not in names:
+            names.append(node.name)
+    return tuple(names)
+
+class Compiler(NodeVisitor):
+
+    def compile(self, tree: NodeTree):
+        self.code, self.dynamic = Code('<module>'), False
+        self.directives = {} # id of a directive's expression: its code, shared by every exec of it
+        self.visit(tree)
+        return self.code
+
+    def body(self, code: Code, nodes):
+        old_code, self.code = self.code, code
+        for node in nodes:
+            self.visit(node)
+            code.last = last(node)
+            if isinstance(node, expressions):
+                code.emit(op.POP)
+            if isinstance(node, ReturnValue):
+                code.ret = node
+                break
+        self.code = old_code
+        return code
+
+    def store(self, name: str, node: Node, checked: bool):
+        slots = self.code.slots
+        if slots is not None:
+            self.code.emit(op.DEF_FAST if checked else op.STORE_FAST, slots[name], node)
+        else:
+            self.code.emit(op.DEF_GLOBAL if checked else op.STORE_GLOBAL, self.code.const(name), node)
+
+    def visit_NodeTree(self, nodes: NodeTree):
+        self.body(self.code, nodes)
+
+    def visit_Ignore(self, _: Ignore):
+        return
+
+    def visit_AddSpecialCommentName(self, _: AddSpecialCommentName):
+        return
+    def visit_AddSpecialCommentKey(self, _: AddSpecialCommentKey):
+        return
+    def visit_ExecuteSpecialComment(self, node: ExecuteSpecialComment):
+        bodies = tuple(self.directive(k, target) for k, target in zip(node.key, node.targets) if target is not None)
+        self.code.emit(op.EXEC, self.code.const(bodies), node)
+
+    def directive(self, name: str, value: Node):
+        # a directive runs in whatever frame execs it, so its names are looked up dynamically
+        code = self.directives.get(id(value))
+        if code is None:
+            code = self.directives[id(value)] = Code(name)
+            old_code, old_dynamic, self.code, self.dynamic = self.code, self.dynamic, code, True
+            self.visit(value)
+            self.code, self.dynamic = old_code, old_dynamic
+            code.emit(op.RETURN)
+        return code
+
+    def visit_BinOp(self, node: BinOp):
+        self.visit(node.left)
+        if node.op == tok.DOT:
+            self.code.emit(op.GETATTR, self.code.const(node.right.name), node)
+            return
+        self.visit(node.right)
+        self.code.emit(op.BINARY, self.code.const(operators[node.op.value]), node)
+
+    def visit_UnaryOp(self, node: UnaryOp):
+        self.visit(node.value)
+        self.code.emit(
+            op.UNARY,
+            self.code.const("__positive__" if node.op == tok.PLUS else "__negative__"),
+            last(node.value)
+        )
+
+    def visit_LiteralValue(self, node: LiteralValue):
+        self.code.emit(op.LOAD_CONST, self.code.const(node.value), node)
+
+    def visit_NewVar(self, node: NewVar):
+        self.visit(node.value)
+        self.store(node.name, node, True)
+
+    def visit_getVariable(self, node: getVariable):
+        slots = self.code.slots
+        if self.dynamic:
+            self.code.emit(op.LOAD_NAME, self.code.const(node.name), node)
+        elif slots is not None and node.name in slots:
+            self.code.emit(op.LOAD_FAST, slots[node.name], node)
+        else:
+            self.code.emit(op.LOAD_GLOBAL, self.code.const(node.name), node)
+
+    def visit_NewFunc(self, node: NewFunc):
+        func = self.body(Code(node.name, tuple(node.args), local_names(node.args, node.body)), node.body)
+        func.memo = node.memo
+        if node.name == "main":
+            func.as_global = self.body(Code(node.name, tuple(node.args)), node.body)
+        self.code.emit(op.MAKE_FUNC, self.code.const(func), node)
+        self.store(node.name, node, False)
+
+    def visit_ReturnValue(self, node: ReturnValue):
+        self.visit(node.expr)
+        self.code.emit(op.RETURN, 0, node)
+
+    def visit_ObjectCall(self, node: ObjectCall):
+        self.visit(node.name)
+        for arg in node.args:
+            self.visit(arg)
+        self.code.emit(op.CALL, len(node.args), node)
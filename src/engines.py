@@ -0,0 +1,29 @@
+# what main.py needs to pick and tune an engine, kept light: the vm is imported only when asked for
+names = ("tree", "vm")
+
+def engine(name: str):
+    if name == "vm":
+        from src.vm import FekVM
+        return FekVM
+    from src.interpreter import FekInterpreter
+    return FekInterpreter
+
+def configure(inter, options: dict):
+    # the command line options that tune an interpreter, shared by main.py and the workers
+    if "O" in options:
+        from src.optimizer import Optimizer
+        inter.optimizer = Optimizer(inter.name)
+    if options.get("max-depth"):
+        inter.recursion_max = int(options["max-depth"])
+    if options.get("memo-size"):
+        inter.memo_size = int(options["memo-size"])
+    if options.get("memory-limit"):
+        inter.heap.limit = int(options["memory-limit"]) # bytes, kept across reset
+    if options.get("fuel") or options.get("deadline"):
+        inter.limit(
+            int(options["fuel"]) if options.get("fuel") else None,
+            float(options["deadline"]) if options.get("deadline") else None
+        )
+    if "tail-calls" in options:
+        inter.tail_calls = True # only the vm engine eliminates tail calls
+    return inter
\ No newline at end of file
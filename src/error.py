@@ -1,10 +1,23 @@
-from colorama import init, Fore
-import textwrap
-init()
+import sys
+from bisect import bisect_right
 
-Y, R, M = Fore.LIGHTYELLOW_EX, Fore.LIGHTRED_EX, Fore.LIGHTCYAN_EX
-P = Fore.CYAN
-RE = Fore.RESET
+plain = ("",)*5
+palette = None
+
+def colors(stream=None):
+    # (yellow, red, light cyan, cyan, reset), colorama is only loaded once something is rendered to a terminal
+    global palette
+    stream = sys.stdout if stream is None else stream
+    try:
+        if not stream.isatty():
+            return plain
+    except (AttributeError, ValueError):
+        return plain
+    if palette is None:
+        from colorama import init, Fore
+        init()
+        palette = Fore.LIGHTYELLOW_EX, Fore.LIGHTRED_EX, Fore.LIGHTCYAN_EX, Fore.CYAN, Fore.RESET
+    return palette
 
 class ExceptionType:
     
@@ -15,33 +28,118 @@ class ExceptionType:
     def __eq__(self, o: object) -> bool:
         return self is o
 
+def pack(offset: int, width: int=None):
+    # a source position in one int: the offset, and the pointer width (+1, 0 when absent) in the low bits
+    return offset << 16 | (0 if width is None else min(width, 0xFFFE)+1)
+
+def unpack(pos: int):
+    width = pos & 0xFFFF
+    return pos >> 16, width-1 if width else None
+
+class LineIndex:
+    # where every line of a source starts, built once per source and shared by all its errors
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.newlines = []
+        i = text.find("\n")
+        while i != -1:
+            self.newlines.append(i)
+            i = text.find("\n", i+1)
+
+    def locate(self, offset: int):
+        # a newline belongs to the line it opens, at column -1
+        line = bisect_right(self.newlines, offset)
+        return line, offset-(self.newlines[line-1] if line else -1)-1
+
+    def line(self, line: int):
+        start = self.newlines[line-1]+1 if line else 0
+        end = self.newlines[line] if line < len(self.newlines) else len(self.text)
+        return self.text[start:end].rstrip("\r")
+
+indexes = {} # id of a source text: its LineIndex, for the few most recent sources
+
+def line_index(source):
+    text = source if isinstance(source, str) else source.text()
+    index = indexes.get(id(text))
+    if index is None or index.text is not text:
+        if len(indexes) >= 16:
+            indexes.clear() # one atomic step, safe with other threads looking up sources too
+        index = indexes[id(text)] = LineIndex(text)
+    return index
+
+def locate(source, offset: int):
+    return line_index(source).locate(offset)
+
+class Diagnostic:
+    # an error for machine consumers: line and col count from 1, width is the characters pointed at
+    __slots__ = ("program", "code", "message", "line", "col", "width")
+
+    def __init__(self, program: str, code: str, message: str, line: int, col: int, width: int) -> None:
+        self.program, self.code, self.message = program, code, message
+        self.line, self.col, self.width = line, col, width
+
+    def as_dict(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"{self.program}:{self.line}:{self.col}: {self.code}: {self.message}"
+
 class FekException(Exception):
     
     def __init__(
-        self, in_pro: str, error: ExceptionType, msg: str, loc: tuple, source: str, is_eof: bool=False,
+        self, in_pro: str, error: ExceptionType, msg: str, loc, source: str, is_eof: bool=False,
         no_pointer:bool=False) -> None:
         self.pro = in_pro
         self.error, self.msg = error, msg
-        self.line, self.col = loc[0], loc[1]
-        self.width = loc[2]-1 if len(loc) > 2 else 0
-        self.line_str = source.splitlines()[self.line]
+        self.loc, self.source, self.is_eof = loc, source, is_eof
         self.no_pointer = no_pointer
-        if is_eof:
-            self.col = len(self.line_str)
+        self.resolved = None
         self.pretty = None
-        super().__init__(self.__repr__())
+        super().__init__(msg)
+        if not isinstance(source, str):
+            self.resolve() # a stream may be closed by the time the error is shown
+    
+    def resolve(self):
+        # (line, col, width, line text), only looked up once something asks for them
+        if self.resolved is None:
+            index, loc = line_index(self.source), self.loc
+            if isinstance(loc, int):
+                offset, width = unpack(loc)
+                loc = index.locate(offset) + ((width,) if width is not None else ())
+            line, col = loc[0], loc[1]
+            line_str = index.line(line)
+            if self.is_eof:
+                col = len(line_str)
+            self.resolved = line, col, loc[2]-1 if len(loc) > 2 else 0, line_str
+        return self.resolved
+    
+    line = property(lambda self: self.resolve()[0])
+    col = property(lambda self: self.resolve()[1])
+    width = property(lambda self: self.resolve()[2])
+    line_str = property(lambda self: self.resolve()[3])
+    
+    def diagnostic(self):
+        line, col, width, _ = self.resolve()
+        return Diagnostic(self.pro, str(self.error), self.msg, line+1, col+1, width+1)
+    
+    def __str__(self) -> str:
+        return self.__repr__()
     
     def __repr__(self) -> str:
         if self.pretty is None:
-            l, c = self.line+1, self.col+1
+            import textwrap
+            Y, R, M, P, RE = colors()
+            line, col, width, line_str = self.resolve()
+            l, c = line+1, col+1
             head = \
             f"[line:{Y}{l}{RE}|col:{Y}{c}{RE}] In {M}'{self.pro}'{RE} >> {R}{self.error}{RE}:"
             middle = f" {l} │"
             space = ' '*(len(middle)-1)
             bottom = '{sp}│ {sp_col}{pointer} '.format(
                 sp=space,
-                sp_col=' '*self.col,
-                pointer=('└'+'─'*(self.width-1)+("┴─" if self.width != 0 else "─")) if self.no_pointer is False else '',
+                sp_col=' '*col,
+                pointer=('└'+'─'*(width-1)+("┴─" if width != 0 else "─")) if self.no_pointer is False else '',
             )
             space2 = ' '*len(bottom)
             nl = self.msg.find("\n")
@@ -50,18 +148,18 @@ class FekException(Exception):
                     else self.msg
             bottom = bottom+P+msg+RE
             head += f"\n{space}│"
-            rela = c+self.width
+            rela = c+width
             if self.no_pointer is False:
                 middle += \
 f""" \
-{self.line_str[:self.col]}\
+{line_str[:col]}\
 {R}\
-{self.line_str[self.col:rela]}\
+{line_str[col:rela]}\
 {RE}\
-{self.line_str[rela:]}\
+{line_str[rela:]}\
 """
             else:
-                middle += self.line_str
+                middle += line_str
             self.pretty = f'{head}\n{middle}\n{bottom}\n'
         return self.pretty
 
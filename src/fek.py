@@ -1,4 +1,3 @@
-from inspect import signature
 from src.memory import ScopeTable
 
 class FekSymbol:
@@ -34,7 +33,7 @@ class FekStruct(FekSymbol):
             self.inherite.change_level(f"UNI:{scope.level}")
         else:
             self.inherite = None
-        self.max_arg = len(signature(self.scope.get("__init__")).parameters)
+        self.max_arg = self.scope.get("__init__").__code__.co_argcount
         super().__init__(self.scope.level)
     
     def __repr__(self):
@@ -0,0 +1,60 @@
+from src.builtin import Rope
+from src.fek import FekObject
+
+# rough CPython sizes in bytes, close enough to hold programs to a quota
+STRING = 49 # an empty str, its characters come on top
+OBJECT = 120 # a struct instance with its scope, its slots come on top
+SCOPE = 120 # a function frame, its slots come on top
+SLOT = 40 # one binding in a scope or frame
+
+heaped = (str, Rope, FekObject) # values that cost more than the slot holding them
+
+def string_op(name: str, left, right):
+    # what an operation on a string allocates, known before it runs
+    if name == "__mult__":
+        return STRING+len(left)*right if type(right) is int and right > 0 else 0
+    if name == "__add__":
+        added = len(right) if type(right) is str or type(right) is Rope else 24
+        return STRING+added+(0 if type(left) is Rope else len(left))
+    return 0
+
+def size(value):
+    t = type(value)
+    if t is str:
+        return STRING+len(value)
+    if t is Rope:
+        return STRING+value.length
+    if t is FekObject:
+        return OBJECT+SLOT*len(value.scope.memory)
+    return 0
+
+class Heap:
+    # what a program holds, approximately: everything allocated in a call is given back when
+    # it returns, except its result. Numbers and builtins are not counted
+
+    def __init__(self, limit: int=None) -> None:
+        self.limit = limit # bytes, None for no quota
+        self.bytes = self.objects = self.peak = 0
+
+    def charge(self, size: int, count: int=1):
+        # False, and nothing charged, when it would exceed the quota: the caller raises instead
+        if self.limit is not None and self.bytes+size > self.limit:
+            return False
+        self.bytes += size
+        self.objects += count
+        if self.bytes > self.peak:
+            self.peak = self.bytes
+        return True
+
+    def mark(self):
+        return self.bytes, self.objects
+
+    def release(self, mark):
+        self.bytes, self.objects = mark
+
+    def stats(self):
+        return {"bytes": self.bytes, "objects": self.objects, "peak": self.peak, "limit": self.limit}
+
+    def __repr__(self) -> str:
+        limit = "no limit" if self.limit is None else f"limit {self.limit}"
+        return f"{self.bytes} bytes in {self.objects} objects, peak {self.peak} bytes, {limit}"
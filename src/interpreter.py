@@ -1,13 +1,20 @@
-from typing import Iterable
 from src.fek import FekEmpty, FekObject, FekStruct, FekVariable, RaiseAnError
 from src.nodes import *
 from src.lexer import Lexer
 from src.parser import Parser
 from src.memory import ScopeTable
-from src.builtin import setup
+from src.builtin import (
+    FunctionObject, IntegerObject, NullObject, Rope, StringObject,
+    environment, methods, resolve_operator, type_name
+)
 from src.token import tok
+from src.compiler import operators
+from src.output import Output
+from src.memo import Memo, missing
+from src.heap import SCOPE, SLOT, Heap, heaped, size, string_op
+from src.budget import Budget
 import sys
-from src.error import R, RE, Y
+from src.error import colors, locate, unpack
 sys.setrecursionlimit(2147483647)
 l = type(lambda:0)
 def __():
@@ -19,37 +26,85 @@ def is_function(obj):
 
 class FekInterpreter(NodeVisitor):
     
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, output: Output=None) -> None:
         self.lexer, self.parser = Lexer(name), Parser(name)
-        self.scope = ScopeTable('<GLOBAL>')
-        for obj in setup():
-            self.scope.insert(
-                FekVariable(obj.name, obj) if not isinstance(obj, FekVariable) 
-                else obj
-                )
-        self.stringtype: FekStruct = self.scope.get("string").value
-        self.integertype: FekStruct = self.scope.get("integer").value
-        self.functiontype: FekStruct = self.scope.get("function").value
-        self.null: FekObject = self.scope.get("NULL").value()
-        self.scope.insert(FekVariable('NULL', self.null))
+        self.output = Output() if output is None else output
+        self.globals = self.scope = ScopeTable('<GLOBAL>', memory=environment(self.output))
+        self.stringtype: FekStruct = StringObject
+        self.integertype: FekStruct = IntegerObject
+        self.functiontype: FekStruct = FunctionObject
+        self.nulltype: FekStruct = NullObject
+        self.null = None
         self.recursion, self.recursion_max = 0, 500
-        self.comments = {}
+        self.memos, self.memo_size = {}, 1024 # definition site: its Memo
+        self.exit_code = True # main returns the exit code, an embedded program returns any value
+        self.heap = Heap()
+        self.budget, self.metered = Budget(), False
         super().__init__(name)
     
+    def reset(self, name: str=None):
+        # forget what the last program defined, the builtins stay, ready for the next one
+        if name is not None:
+            self.name = self.lexer.name = self.parser.name = name
+        self.globals = self.scope = ScopeTable('<GLOBAL>', memory=environment(self.output))
+        self.memos.clear()
+        self.heap = Heap(self.heap.limit)
+        self.recursion = 0
+    
     def convert_literal(self, literal):
         if isinstance(literal, RaiseAnError):
             self.throw_error(
                 self.last_visited_node,
                 literal.error, literal.msg
             )
-        if isinstance(literal, str):
-            return self.stringtype(literal)
-        if isinstance(literal, int):
-            return self.integertype(literal)
-        if literal is None:
-            return self.null
         return literal
     
+    def allocate(self, node: Node, size: int, count: int=1):
+        if not self.heap.charge(size, count):
+            self.throw_error(
+                node, "MemoryError", f"Exceeded the memory quota of {self.heap.limit} bytes"
+            )
+
+    def limit(self, fuel: int=None, seconds: float=None):
+        # the budget of every following run, None for no limit
+        self.budget = Budget(fuel, seconds)
+        return self
+
+    def start(self):
+        # a full budget for the run about to begin, nodes are only counted under a limit
+        self.budget.start()
+        self.metered = self.budget.limited
+        if self.metered:
+            self.visit = self.metered_visit
+        else:
+            self.__dict__.pop("visit", None)
+
+    def spend(self, node: Node, steps: int):
+        out = self.budget.spend(steps)
+        if out is not None:
+            self.throw_error(node, *out)
+
+    def metered_visit(self, node: Node):
+        self.spend(node, 1)
+        return NodeVisitor.visit(self, node)
+    
+    def box(self, value):
+        # build the full struct instance of an unboxed value, only when user code needs one
+        if isinstance(value, (str, Rope)):
+            return self.stringtype(str(value))
+        if isinstance(value, (int, float)):
+            return self.integertype(value)
+        if value is None:
+            return self.nulltype()
+        return value
+    
+    def execute(self, tree):
+        self.start()
+        try:
+            return self.visit(tree)
+        finally:
+            self.output.flush()
+    
     def visit_str(self, node: str):
         return self.convert_literal(node)
     def visit_int(self, node: int):
@@ -78,7 +133,7 @@ class FekInterpreter(NodeVisitor):
             for node in body:
                 if isinstance(node, ReturnValue):
                     r:FekObject = self.visit(node)
-                    if r.name != "integer":
+                    if self.exit_code and type_name(r) != "integer":
                         self.throw_error(
                             node, "ExitCodeError",
                             "Expected integer", True
@@ -90,70 +145,70 @@ class FekInterpreter(NodeVisitor):
     def visit_Ignore(self, _: Ignore):
         return
     
-    def visit_AddSpecialCommentName(self, node: AddSpecialCommentName):
-        if node.content is None:
-            return
-        self.comments[node.content] = self.null
-    def visit_AddSpecialCommentKey(self, node: AddSpecialCommentKey):
-        self.comments[node.name] = node.value
+    # directives are indexed when the program is parsed, exec runs them where it stands
+    def visit_AddSpecialCommentName(self, _: AddSpecialCommentName):
+        return
+    def visit_AddSpecialCommentKey(self, _: AddSpecialCommentKey):
+        return
     def visit_ExecuteSpecialComment(self, node: ExecuteSpecialComment):
-        if isinstance(node.key, Iterable):
-            for k in node.key:
-                if k in self.comments:
-                    self.visit(self.comments[k])
-                else:
-                    self.throw_error(
-                        node, "TypeError", f"{k} is not found", True
-                    )
-        else:
-            if node.key in self.comments:
-                self.visit(self.comments[node.key])
+        for target in node.targets:
+            if target is not None:
+                self.visit(target)
         return self.null
 
+    def binary_op(self, node: BinOp, name: str, left, right):
+        cache = node.cache
+        if cache is not None and cache[0] is type(left) and cache[1] is type(right):
+            re = cache[2](left, right)
+        else:
+            impl = resolve_operator(name, type(left), type(right))
+            if impl is not None:
+                if type(left) is str or type(left) is Rope:
+                    # not cached: string results are charged to the heap before they are built
+                    self.allocate(node, string_op(name, left, right))
+                else:
+                    node.cache = (type(left), type(right), impl)
+                re = impl(left, right)
+            else:
+                re = left[name](left.scope, right.scope if isinstance(right, (FekObject, FekStruct)) else right)
+        if isinstance(re, RaiseAnError):
+            self.throw_error(
+                node, re.error, re.msg
+            )
+        return self.convert_literal(re)
+    
+    def unary_op(self, node: Node, name: str, value):
+        table = methods.get(type(value))
+        re = table[name](value) if table is not None else value[name](value.scope)
+        if isinstance(re, RaiseAnError):
+            self.throw_error(
+                self.origin(node), re.error, re.msg
+            )
+        return re
+    
+    def origin(self, node: Node):
+        return node # the node an error of a unary operator points at, see FekVM
+    
+    def get_attribute(self, node: Node, left, name: str):
+        left = self.box(left)
+        re = left["__getattr__"](left.scope, self.box(name).scope)
+        if isinstance(re, RaiseAnError):
+            self.throw_error(
+                node, re.error, re.msg
+            )
+        self.output.write(f"{re}\n")
+        return self.convert_literal(re)
+
     def visit_BinOp(self, node: BinOp):
         if node.op == tok.DOT:
-            left = self.visit(node.left)
-            re = left["__getattr__"](left.scope, self.convert_literal(node.right.name).scope)
-            if isinstance(re, RaiseAnError):
-                self.throw_error(
-                    node, re.error, re.msg
-                )
-            print(re)
-            return self.convert_literal(re)
+            return self.get_attribute(node, self.visit(node.left), node.right.name)
         left, right = self.visits(node.left, node.right)
-        if node.op == tok.PLUS:
-            re = left["__add__"](left.scope, right.scope)
-            if isinstance(re, RaiseAnError):
-                self.throw_error(
-                    node, re.error, re.msg
-                )
-            return self.convert_literal(re)
-        if node.op == tok.MINUS:
-            re = left["__sub__"](left.scope, right.scope)
-            if isinstance(re, RaiseAnError):
-                self.throw_error(
-                    node, re.error, re.msg
-                )
-            return self.convert_literal(re)
-        if node.op == tok.MULT:
-            re = left["__mult__"](left.scope, right.scope)
-            if isinstance(re, RaiseAnError):
-                self.throw_error(
-                    node, re.error, re.msg
-                )
-            return self.convert_literal(re)
-        if node.op == tok.DIV:
-            re = left["__div__"](left.scope, right.scope)
-            if isinstance(re, RaiseAnError):
-                self.throw_error(
-                    node, re.error, re.msg
-                )
-            return self.convert_literal(re)
+        return self.binary_op(node, operators[node.op.value], left, right)
     
     def visit_UnaryOp(self, node: UnaryOp):
-        v: FekObject = self.visit(node.value)
-        return self.convert_literal(
-            v["__positive__" if node.op == tok.PLUS else "__negative__"](v.scope))
+        v = self.visit(node.value)
+        return self.unary_op(
+            self.last_visited_node, "__positive__" if node.op == tok.PLUS else "__negative__", v)
     
     def visit_LiteralValue(self, node: LiteralValue):
         return self.convert_literal(node.value)
@@ -166,6 +221,7 @@ class FekInterpreter(NodeVisitor):
                 True
             )
         var = FekVariable(node.name, self.visit(node.value))
+        self.allocate(node, SLOT, 0)
         self.scope.insert(var)
     
     def visit_getVariable(self, node: getVariable):
@@ -176,8 +232,18 @@ class FekInterpreter(NodeVisitor):
             )
         return self.scope.get(node.name).value
     
+    def make_function(self, name: str, args, body, memo: bool, site=None):
+        # functions made by the same definition are the same, they share one memo
+        func = self.functiontype(args, body)
+        if memo:
+            if site not in self.memos:
+                self.memos[site] = Memo(name, self.memo_size)
+            func.scope.put("__memo__", self.memos[site])
+        return func
+    
     def visit_NewFunc(self, node: NewFunc):
-        func = self.functiontype(node.args, node.body)
+        func = self.make_function(node.name, node.args, node.body, node.memo, node)
+        self.allocate(node, size(func)+SLOT)
         self.scope.insert(FekVariable(node.name, func))
     
     def visit_ReturnValue(self, node: ReturnValue):
@@ -185,9 +251,24 @@ class FekInterpreter(NodeVisitor):
     
     def visit_ObjectCall(self, node: ObjectCall):
         self.recursion += 1
+        scope, mark = self.scope, self.heap.mark()
+        try:
+            r = self.call_object(node)
+        finally:
+            self.recursion -= 1
+            self.scope = scope
+            self.heap.release(mark)
+        if type(r) in heaped:
+            self.allocate(node, size(r)) # the result outlives the call
+        return r
+    
+    def call_object(self, node: ObjectCall):
         if self.recursion == self.recursion_max:
+            line, col = locate(self.source, unpack(node.pos)[0])
+            self.output.flush()
+            Y, R, _, _, RE = colors(sys.stderr)
             sys.stderr.write(
-                f'{R}[RecursionWarning|{node.loc[0]}:{node.loc[1]}]{Y} Recursion reached 500 {RE}\n')
+                f'{R}[RecursionWarning|{line}:{col}]{Y} Recursion reached {self.recursion_max} {RE}\n')
             self.throw_error(
                 node, "RecursionError", "Reached limit"
             )
@@ -207,9 +288,7 @@ class FekInterpreter(NodeVisitor):
                 self.throw_error(
                     node, r.error, r.msg
                 )
-            r = self.convert_literal(r)
-            self.recursion -= 1
-            return r
+            return self.convert_literal(r)
         if not isinstance(obj, FekObject):
             self.throw_error(
                 node, "TypeError", f"{obj} is not callable.", True
@@ -228,11 +307,19 @@ class FekInterpreter(NodeVisitor):
             )
         body = call(func)
         args = {args_name[i]:FekVariable(args_name[i], self.visit(n)) for i, n in enumerate(node.args[:len_n])}
+        memo, key = func.get("__memo__"), None
+        if memo is not None:
+            key = memo.key([var.value for var in args.values()])
+            if key is not None:
+                r = memo.get(key)
+                if r is not missing:
+                    return r
         old_scope = self.scope
+        # the frame holds the arguments and a snapshot of the globals, which win over them
         self.scope = ScopeTable(
-            obj.name, parent=old_scope
+            obj.name, parent=old_scope, memory={**args, **self.globals.memory}
         )
-        self.scope.merge(args)
+        self.allocate(node, SCOPE+SLOT*len(self.scope.memory))
         r = self.null
         for node in body:
             if isinstance(node, ReturnValue):
@@ -240,5 +327,6 @@ class FekInterpreter(NodeVisitor):
                 break
             self.visit(node)
         self.scope = old_scope
-        self.recursion -= 1
+        if key is not None:
+            memo.put(key, r)
         return r
\ No newline at end of file
@@ -1,5 +1,7 @@
-from src.token import Token, TokenTree, tok
-from src.error import Error, FekException
+import re
+from sys import intern
+from src.token import StreamSource, Token, TokenStream, TokenTree, tok
+from src.error import Error, FekException, pack
 
 characters = {
     "(": tok.LPAREN,
@@ -32,147 +34,94 @@ words = (
     "exec",
 )
 
+# one alternative per token class, tried in order at every position
+# (a block comment may close on its own opening star: "/*/" is a comment)
+scanner = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/(?=\*).*?\*/)
+  | (?P<open_comment>/\*)
+  | (?P<number>\d+(?P<fraction>\.\d*)?)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<open_string>"(?:[^"\\]|\\.)*|'(?:[^'\\]|\\.)*)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<char>[(){}\[\]+\-*/:!=,.])
+  | (?P<invalid>.)
+""", re.VERBOSE | re.DOTALL)
+escapes = re.compile(r"\\(.)", re.DOTALL)
+
+def unescape(match: re.Match):
+    return escape.get(match[1], match[1])
+
 class Lexer:
-    
+
     def __init__(self, name: str) -> None:
         self.name = name
-    
-    def init(self, source: str):
-        self.source, self.len_s = source, len(source)
-        self.pos, self.char, self.chars = -1, None, ''
-        self.line, self.col = 0, -1
-        self.advance()
-    
-    def throw_error(self, error, msg, width:int=1):
+
+    def init(self, source):
+        self.source = source
+
+    def throw_error(self, error, msg, pos: int, width:int=1):
         raise FekException(
-            self.name, error, msg, (self.line, self.col, width),
+            self.name, error, msg, pack(pos, width),
             self.source
         )
-    
-    def advance(self):
-        self.pos += 1
-        self.col += 1
-        self.char = None if self.pos >= self.len_s else self.source[self.pos]
-        if self.char == "\n":
-            self.line += 1
-            self.col = -1
-    
-    def peek(self, step:int=1):
-        p = self.pos+step
-        return None if p >= self.len_s else self.source[p]
-    
-    def match(self, string:str):
-        boolean = (s == self.peek(i) for i, s in enumerate(string))
-        return not (False in boolean)
 
-    def enter(self, step:int=1):
-        c = ''
-        for _ in range(step):
-            if self.char is None:
-                self.throw_error(
-                    Error.SYNTAX, "Unexpected EOF while scanning"
-                )
-            self.chars += self.char
-            c += self.char
-            self.advance()
-        return c
-    def skip(self, step:int=1):
-        c = ''
-        for _ in range(step):
-            if self.char is None:
+    def scan(self, read, chunk_size: int):
+        # read(size) hands out the source piece by piece and '' once it is exhausted,
+        # a match touching the end of the buffer may continue in the next piece
+        buffer, base, eof = read(chunk_size), 0, False
+        while True:
+            end, done = len(buffer), 0
+            for m in scanner.finditer(buffer):
+                kind = m.lastgroup
+                if not eof and (m.end() == end or kind == "open_string" or kind == "open_comment"):
+                    break
+                done = m.end()
+                if kind == "space" or kind == "comment":
+                    continue
+                if kind == "name":
+                    value = intern(m.group())
+                    yield Token(tok.IDENTIFIER if value not in words else tok.KEYWORD, value, base+m.start())
+                    continue
+                if kind == "char":
+                    value = m.group()
+                    yield Token(characters[value], value, base+m.start())
+                    continue
+                if kind == "number":
+                    value = m.group()
+                    yield Token(tok.LITERAL, float(value) if m.group("fraction") else int(value), base+m.start())
+                    continue
+                if kind == "string":
+                    yield Token(tok.LITERAL, escapes.sub(unescape, m.group()[1:-1]), base+m.start())
+                    continue
+                if kind == "invalid":
+                    self.throw_error(
+                        Error.SYNTAX, f"Invalid character: '{m.group()}'", base+m.start()
+                    )
+                # unterminated string or block comment, report at end of input
+                if kind == "open_string" and m.end() == end:
+                    self.throw_error(
+                        Error.SYNTAX, f"Expected ({m.group()[0]})", base+end
+                    )
                 self.throw_error(
-                    Error.SYNTAX, "Unexpected EOF while scanning"
+                    Error.SYNTAX, "Unexpected EOF while scanning", base+end
                 )
-            c += self.char
-            self.advance()
-        return c
-    def enter_if(self, string: str):
-        if not self.match(string):
-            self.throw_error(
-                Error.SYNTAX, f"Expected ({string})",
-                len(string)
-            )
-        return self.enter(len(string))
-    def skip_if(self, string: str):
-        if not self.match(string):
-            self.throw_error(
-                Error.SYNTAX, f"Expected ({string})",
-                len(string)
-            )
-        return self.skip(len(string))
-    def enter_while(self, expr):
-        c = ''
-        while self.char is not None and expr(self.char):
-            c += self.enter()
-        return c
-    def skip_while(self, expr):
-        c = ''
-        while self.char is not None and expr(self.char):
-            c += self.skip()
-        return c
-    def clear(self):
-        c = self.chars
-        self.chars = ''
-        return c
-    def enter_clear(self, step:int=1):
-        self.enter(step)
-        return self.clear()
-    def skip_clear(self, step:int=1):
-        self.skip(step)
-        return self.clear()
-    
-    def string_literal(self):
-        lc = self.line, self.col
-        p = self.skip()
-        while self.char is not None and self.char != p:
-            if self.char == "\\":
-                self.skip()
-                if self.char in escape:
-                    self.chars += escape[self.char]
-                    self.skip()
-                    continue
-            self.enter()
-        self.skip_if(p)
-        return Token(tok.LITERAL, self.clear(), lc)
-    
-    def number_literal(self):
-        lc = self.line, self.col
-        self.enter_while(lambda c: c.isdigit())
-        if self.char == ".":
-            self.enter()
-            self.enter_while(lambda c: c.isdigit())
-            return Token(tok.LITERAL, float(self.clear()), lc)
-        return Token(tok.LITERAL, int(self.clear()), lc)
-    
+            else:
+                if eof:
+                    return
+            # keep the unfinished tail, growing the read so a long token is rescanned O(1) times
+            chunk = read(max(chunk_size, end-done))
+            eof = not chunk
+            buffer, base = buffer[done:]+chunk, base+done
+
+    def tokens(self, source: str):
+        self.init(source)
+        pieces = [source]
+        return self.scan(lambda _: pieces.pop() if pieces else '', len(source))
+
     def lex(self, source: str):
+        return TokenTree(source, *self.tokens(source))
+
+    def stream(self, source: StreamSource):
         self.init(source)
-        tree = []
-        while self.char is not None:
-            lc = self.line, self.col
-            if self.char.isspace():
-                self.skip_while(lambda c: c.isspace())
-                continue
-            if self.match("//"):
-                self.skip_while(lambda c: c != "\n")
-                continue
-            if self.match("/*"):
-                self.skip_while(lambda _: not self.match("*/"))
-                self.skip(2)
-                continue
-            if self.char.isdigit():
-                tree.append(self.number_literal())
-                continue
-            if self.char in ['"',"'"]:
-                tree.append(self.string_literal())
-                continue
-            if self.char in characters:
-                tree.append(Token(characters[self.enter()], self.clear(), lc))
-                continue
-            if self.char.isalpha() or self.char == "_":
-                self.enter_while(lambda c: c.isalnum() or c == '_')
-                tree.append(Token(tok.IDENTIFIER if self.chars not in words else tok.KEYWORD, self.clear(), lc))
-                continue
-            self.throw_error(
-                Error.SYNTAX, f"Invalid character: '{self.char}'"
-            )
-        return TokenTree(self.source, *tree)
\ No newline at end of file
+        return TokenStream(source, self.scan(source.read, source.chunk_size))
\ No newline at end of file
@@ -0,0 +1,37 @@
+from collections import OrderedDict
+
+missing = object()
+
+class Memo:
+    # bounded LRU of a [memo] function's results, keyed by its argument values
+
+    def __init__(self, name: str, size: int=1024) -> None:
+        self.name, self.size = name, size
+        self.results = OrderedDict()
+        self.hits = self.misses = 0
+
+    def key(self, args):
+        # 1, 1.0 and "1" must not share a result; None when an argument can't be hashed
+        key = tuple((type(v), v) for v in args)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key):
+        value = self.results.get(key, missing)
+        if value is missing:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.results.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.results[key] = value
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def __repr__(self) -> str:
+        return f"{self.name}: {self.hits} hits, {self.misses} misses, {len(self.results)}/{self.size} cached"
@@ -1,8 +1,8 @@
 
 class ScopeTable:
     
-    def __init__(self, level, parent=None, memory: dict={}) -> None:
-        self.memory = memory
+    def __init__(self, level, parent=None, memory: dict=None) -> None:
+        self.memory = {} if memory is None else memory
         self.level = level
         self.parent: ScopeTable = parent
     
@@ -65,5 +65,8 @@ class ScopeTable:
             return False
         return self.parent.delete(key, deep_level)
     
+    def __contains__(self, key: str):
+        return key in self.memory
+    
     def __iter__(self):
         return self.memory.__iter__()
\ No newline at end of file
@@ -1,17 +1,22 @@
 from src.error import FekException
-import textwrap
+from src.token import StreamSource
 
 class Node:
+    __slots__ = ("pos",)
     
-    def __init__(self, *loc: int) -> None:
-        self.loc = loc
+    def __init__(self, pos: int) -> None:
+        self.pos = pos # packed source position, see error.pack
+    
+    def fields(self):
+        for cls in reversed(type(self).__mro__[:-2]):
+            for attr in cls.__dict__.get("__slots__", ()):
+                yield attr, getattr(self, attr)
     
     def __repr__(self) -> str:
+        import textwrap
         string = f"{type(self).__name__}"
         sp = ' '*len(string)
-        for attr, v in self.__dict__.items():
-            if attr == "loc":
-                continue
+        for attr, v in self.fields():
             string += f"\n{sp}{attr}"
             s = ' '*len(f"\n{sp}{attr}")
             v = textwrap.indent(v.__repr__(), s)
@@ -20,6 +25,8 @@ class Node:
 
 class NodeVisitor:
     last_visited_node = None
+    cache = None
+    optimizer = None
     def __init__(self, name: str) -> None:
         self.name = name
     
@@ -32,23 +39,46 @@ class NodeVisitor:
         raise NameError(f'no visit_{type(node).__name__} found')
     def throw_error(self, node: Node, error, msg, np:bool=False):
         raise FekException(
-            self.name, error, msg, node.loc, self.source,
+            self.name, error, msg, node.pos, self.source,
             no_pointer=np
         )
     
+    def parse(self, source: str):
+        if self.cache is None:
+            return self.parser.parse(self.lexer.lex(source))
+        tree = self.cache.load(self.name, source)
+        if tree is None:
+            tree = self.parser.parse(self.lexer.lex(source))
+            self.cache.store(self.name, source, tree)
+        return tree
+    
     def interpret(self, source: str):
         self.source = source
-        self.tree = self.parser.parse(self.lexer.lex(source))
-        return self.visit(self.tree)
+        self.tree = self.parse(source)
+        if self.optimizer is not None:
+            self.tree = self.optimizer.optimize(self.tree)
+        return self.execute(self.tree)
+    
+    def interpret_stream(self, file, chunk_size: int=1 << 16):
+        self.source = StreamSource(file, chunk_size)
+        self.tree = self.parser.parse(self.lexer.stream(self.source))
+        if self.optimizer is not None:
+            self.tree = self.optimizer.optimize(self.tree)
+        return self.execute(self.tree)
+    
+    def execute(self, tree):
+        return self.visit(tree)
 
 class NodeTree(Node):
+    __slots__ = ("childrens", "source")
     
-    def __init__(self, source:str, childrens, *loc: int) -> None:
+    def __init__(self, source:str, childrens, pos: int) -> None:
         self.childrens = childrens
         self.source = source
-        super().__init__(*loc)
+        super().__init__(pos)
     
     def __repr__(self):
+        import textwrap
         string = f"{type(self).__name__}"
         for v in self.childrens:
             v = textwrap.indent(v.__repr__(), '\t')
@@ -59,69 +89,94 @@ class NodeTree(Node):
         return self.childrens.__iter__()
     
 class LiteralValue(Node):
+    __slots__ = ("value",)
     
-    def __init__(self, value, *loc: int) -> None:
+    def __init__(self, value, pos: int) -> None:
         self.value = value
-        super().__init__(*loc)
+        super().__init__(pos)
         
 class UnaryOp(Node):
+    __slots__ = ("op", "value")
     
-    def __init__(self, op, value, *loc: int) -> None:
+    def __init__(self, op, value, pos: int) -> None:
         self.op, self.value = op, value
-        super().__init__(*loc)
+        super().__init__(pos)
         
 class getVariable(Node):
+    __slots__ = ("name",)
     
-    def __init__(self, name, *loc: int) -> None:
+    def __init__(self, name, pos: int) -> None:
         self.name = name
-        super().__init__(*loc)
+        super().__init__(pos)
 
 class BinOp(Node):
+    __slots__ = ("left", "op", "right", "cache")
     
-    def __init__(self, left, op, right, *loc: int) -> None:
+    def __init__(self, left, op, right, pos: int) -> None:
         self.left, self.op, self.right = left, op, right
-        super().__init__(*loc)
+        self.cache = None # inline cache: (left type, right type, implementation)
+        super().__init__(pos)
+    
+    def fields(self):
+        return ((k, v) for k, v in super().fields() if k != "cache")
+    
+    def __reduce__(self):
+        # the cache holds runtime functions, it is rebuilt on first use
+        return BinOp, (self.left, self.op, self.right, self.pos)
 
 class NewVar(Node):
+    __slots__ = ("name", "value")
     
-    def __init__(self, name, value, *loc: int) -> None:
+    def __init__(self, name, value, pos: int) -> None:
         self.name, self.value = name, value
-        super().__init__(*loc)
+        super().__init__(pos)
 
 class NewFunc(Node):
+    __slots__ = ("name", "args", "body", "memo")
     
-    def __init__(self, name: str, args: list, body: list, *loc: int) -> None:
+    def __init__(self, name: str, args: list, body: list, pos: int, memo: bool=False) -> None:
         self.name, self.args, self.body = name, args, body
-        super().__init__(*loc)
+        self.memo = memo # preceded by [memo]
+        super().__init__(pos)
 
 class ReturnValue(Node):
+    __slots__ = ("expr",)
     
-    def __init__(self, expr:Node, *loc: int) -> None:
+    def __init__(self, expr:Node, pos: int) -> None:
         self.expr = expr
-        super().__init__(*loc)
+        super().__init__(pos)
 
 class ObjectCall(Node):
+    __slots__ = ("name", "args")
     
-    def __init__(self, name: str, args:list, *loc: int) -> None:
+    def __init__(self, name: str, args:list, pos: int) -> None:
         self.name, self.args = name, args
-        super().__init__(*loc)
+        super().__init__(pos)
 
 class Ignore(Node):
+    __slots__ = ()
     def __init__(self) -> None:
         pass
 
 class AddSpecialCommentName(Node):
+    __slots__ = ("content",)
     
-    def __init__(self, content, *loc: int) -> None:
+    def __init__(self, content, pos: int) -> None:
         self.content = content
-        super().__init__(*loc)
+        super().__init__(pos)
 class AddSpecialCommentKey(Node):
+    __slots__ = ("name", "value")
     
-    def __init__(self, name, value, *loc: int) -> None:
+    def __init__(self, name, value, pos: int) -> None:
         self.name, self.value = name, value
-        super().__init__(*loc)
+        super().__init__(pos)
 class ExecuteSpecialComment(Node):
+    __slots__ = ("key", "targets")
     
-    def __init__(self, key: str, *loc: int) -> None:
+    def __init__(self, key: tuple, pos: int, targets: tuple=None) -> None:
         self.key = key
-        super().__init__(*loc)
\ No newline at end of file
+        self.targets = targets # the expression of each key's directive, None for a plain [name]
+        super().__init__(pos)
+    
+    def fields(self):
+        return ((k, v) for k, v in super().fields() if k != "targets")
\ No newline at end of file
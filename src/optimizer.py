@@ -0,0 +1,102 @@
+from src.builtin import Rope, methods
+from src.compiler import last, operators
+from src.fek import RaiseAnError
+from src.heap import STRING, string_op
+from src.nodes import *
+from src.token import tok
+
+# folded strings longer than this stay as the expression that builds them
+MAX_FOLDED_STRING = 4096
+
+class Optimizer(NodeVisitor):
+    # rewrites a parsed tree: folds literal arithmetic and drops statements after return
+
+    def __init__(self, name: str="<optimizer>") -> None:
+        super().__init__(name)
+
+    def optimize(self, tree: NodeTree):
+        self.directives = {} # id of a directive's expression: (it, its optimized copy)
+        return self.visit(tree)
+
+    def directive(self, value: Node):
+        # every exec of a directive gets the very node its definition holds, the compiler shares its code
+        entry = self.directives.get(id(value))
+        if entry is None:
+            entry = self.directives[id(value)] = (value, self.visit(value))
+        return entry[1]
+
+    def fold(self, node: Node, method, *values):
+        # evaluate with the builtin semantics, operations that fail are kept for the runtime error
+        if not all(type(v) in (int, float, str) for v in values):
+            return node
+        re = method(*values)
+        if type(re) is Rope:
+            re = str(re)
+        if isinstance(re, RaiseAnError) or isinstance(re, str) and len(re) > MAX_FOLDED_STRING:
+            return node
+        return LiteralValue(re, last(node).pos) # where the tree walker would point after evaluating node
+
+    def body(self, nodes):
+        body = []
+        for node in nodes:
+            if isinstance(node, Ignore):
+                continue
+            body.append(self.visit(node))
+            if isinstance(node, ReturnValue):
+                break
+        return body
+
+    def visit_NodeTree(self, nodes: NodeTree):
+        return NodeTree(nodes.source, self.body(nodes), nodes.pos)
+
+    def visit_Ignore(self, node: Ignore):
+        return node
+
+    def visit_AddSpecialCommentName(self, node: AddSpecialCommentName):
+        return node
+    def visit_AddSpecialCommentKey(self, node: AddSpecialCommentKey):
+        return AddSpecialCommentKey(node.name, self.directive(node.value), node.pos)
+    def visit_ExecuteSpecialComment(self, node: ExecuteSpecialComment):
+        targets = tuple(target if target is None else self.directive(target) for target in node.targets)
+        return ExecuteSpecialComment(node.key, node.pos, targets)
+
+    def visit_BinOp(self, node: BinOp):
+        left = self.visit(node.left)
+        if node.op == tok.DOT:
+            return BinOp(left, node.op, node.right, node.pos)
+        right = self.visit(node.right)
+        node = BinOp(left, node.op, right, node.pos)
+        if isinstance(left, LiteralValue) and isinstance(right, LiteralValue):
+            table = methods.get(type(left.value))
+            name = operators[node.op.value]
+            if type(left.value) is str and string_op(name, left.value, right.value) > STRING+MAX_FOLDED_STRING:
+                return node # a string too long to fold is never built, it may not fit in memory at all
+            if table is not None:
+                return self.fold(node, table[name], left.value, right.value)
+        return node
+
+    def visit_UnaryOp(self, node: UnaryOp):
+        value = self.visit(node.value)
+        node = UnaryOp(node.op, value, node.pos)
+        if isinstance(value, LiteralValue):
+            name = "__positive__" if node.op == tok.PLUS else "__negative__"
+            return self.fold(node, methods[type(value.value)][name], value.value)
+        return node
+
+    def visit_LiteralValue(self, node: LiteralValue):
+        return node
+
+    def visit_NewVar(self, node: NewVar):
+        return NewVar(node.name, self.visit(node.value), node.pos)
+
+    def visit_getVariable(self, node: getVariable):
+        return node
+
+    def visit_NewFunc(self, node: NewFunc):
+        return NewFunc(node.name, node.args, self.body(node.body), node.pos, node.memo)
+
+    def visit_ReturnValue(self, node: ReturnValue):
+        return ReturnValue(self.visit(node.expr), node.pos)
+
+    def visit_ObjectCall(self, node: ObjectCall):
+        return ObjectCall(self.visit(node.name), [self.visit(arg) for arg in node.args], node.pos)
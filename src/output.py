@@ -0,0 +1,35 @@
+import sys
+
+class Output:
+    # program output, batched into one write per buffer instead of one per println.
+    # The interpreter flushes it before reading input, on exit and on error
+
+    def __init__(self, sink=None, size: int=1 << 16, buffered: bool=True) -> None:
+        self.sink = sink # None writes to whatever sys.stdout is at flush time
+        self.size = size if buffered else 0
+        self.parts, self.length = [], 0
+
+    def write(self, text: str):
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length >= self.size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if not self.parts:
+            return
+        sink = self.sink if self.sink is not None else sys.stdout
+        sink.write("".join(self.parts))
+        self.parts.clear()
+        self.length = 0
+        if hasattr(sink, "flush"):
+            sink.flush()
+
+    def prompt(self, text: str):
+        if self.sink is None:
+            self.flush()
+            return input(text)
+        self.write(text)
+        self.flush()
+        return input()
@@ -1,61 +1,84 @@
 import sys
-from typing import Iterable
-from src.error import Error, FekException, R, RE, Y
+from src.error import Error, FekException, colors, locate, pack
 from src.nodes import *
 from src.token import TokenTree, tok
 
+# binding powers of the infix operators, the higher binds tighter
+SUM, PRODUCT, ATTRIBUTE, CALL = 10, 20, 30, 40
+later = object() # the target of an exec whose directive is only defined after it
+
 class Parser:
     
     def __init__(self, name: str) -> None:
         self.name = name
         self.start = self.parse_tree
+        # first keyword: (the keyword that must follow it, handler)
         self.actions = {
-            ("def",): self.new_var,
-            ("new","func"): self.new_func,
-            ("return",): self.return_func,
+            "def": (None, self.new_var),
+            "new": ("func", self.new_func),
+            "return": (None, self.return_func),
+        }
+        # token that starts an operand: handler
+        self.prefix = {
+            tok.LITERAL: self.literal,
+            tok.IDENTIFIER: self.variable,
+            tok.PLUS: self.unary,
+            tok.MINUS: self.unary,
+            tok.LPAREN: self.group,
+            tok.KEYWORD: self.keyword,
+        }
+        # token that follows an operand: (binding power, power of its right operand, handler)
+        self.infix = {
+            tok.PLUS: (SUM, SUM, self.binary),
+            tok.MINUS: (SUM, SUM, self.binary),
+            tok.MULT: (PRODUCT, PRODUCT, self.binary),
+            tok.DIV: (PRODUCT, PRODUCT, self.binary),
+            tok.DOT: (ATTRIBUTE, CALL, self.binary),
+            tok.EXCLAMATION: (CALL, None, self.function_calling),
         }
     
     def init(self, tree: TokenTree):
         self.tree = tree
         self.token = None
-        self.line, self.col = -1, -1
+        self.pos = -1
+        self.checked = -1 # a '(' here gets no "forgot '!'" warning, it was given or follows a call
+        self.execs = []
         self.next_token()
     
     def throw_error(self, error, msg, width:int=1):
         raise FekException(
             self.name, error, msg,
-            (self.line, self.col, width),
+            pack(self.pos, width),
             self.tree.source, self.token is None
         )
     
     def next_token(self):
         self.token = self.tree.next()
         if self.token is not None:
-            self.line, self.col = self.token.line, self.token.col
+            self.pos = self.token.pos
     
     def peek(self, step:int=1):
         return self.tree.peek(step)
     
     def get_tt(self, types):
         return "EOF" if self.token is None else self.token.type, \
-             (',\n'.join(map(str, types[:-1]))+f' or {types[-1]}') if isinstance(types, Iterable) else str(types)
-    
-    def eat(self, types=None):
-        if types is not None:
-            r = (self.token in types) if isinstance(types, Iterable) else (self.token == types)
-        else:
-            r = True
-        if r:
-            t = self.token
-            self.next_token()
-            return t
+             (',\n'.join(map(str, types[:-1]))+f' or {types[-1]}') if isinstance(types, (tuple, list)) else str(types)
+    
+    def expected(self, types, word: str="expected"):
         t, ty = self.get_tt(types)
         self.throw_error(
             Error.SYNTAX,
-            f"Unexpected {t}, expected {ty}",
-            1 if isinstance(t, str) else len(self.token.value)
+            f"Unexpected {t}, {word} {ty}",
+            1 if isinstance(t, str) else len(str(self.token.value))
         )
     
+    def eat(self, type=None):
+        token = self.token
+        if type is not None and (token is None or token.type is not type):
+            self.expected(type)
+        self.next_token()
+        return token
+    
     def eats(self, *types):
         t = []
         for ty in types:
@@ -68,32 +91,37 @@ class Parser:
                 break
             self.eat()
 
-    def match(self, types):
-        boolean = (self.peek(i) == x for i, x in enumerate(types))
-        return not (False in boolean)
-    
     def parse_tree(self):
-        lc = self.line, self.col
+        pos = self.pos
         tree = []
         while self.token is not None:
-            tree.append(self.statement())
-        return NodeTree(self.tree.source, tree, *lc)
+            tree.append(self.mark(tree, self.statement()))
+        return NodeTree(self.tree.source, tree, pack(pos))
     
     def statement(self, accept_return:bool=False):
-        if self.token == tok.KEYWORD:
-            for p, a in self.actions.items():
-                if self.match(p):
-                    if "return" in p and accept_return is False:
-                        self.throw_error(
-                            "SyntaxError",
-                            "return keyword outside function",
-                            6   
-                        )
-                    return a()
-        if self.token == tok.LSQUAREB:
+        token = self.token
+        if token is None:
+            return self.expression()
+        if token.type is tok.KEYWORD:
+            follow, action = self.actions.get(token.value, (None, None))
+            if action is not None and (follow is None or self.peek() == follow):
+                if token.value == "return" and accept_return is False:
+                    self.throw_error(
+                        "SyntaxError",
+                        "return keyword outside function",
+                        6   
+                    )
+                return action()
+        if token.type is tok.LSQUAREB:
             return self.comment()
         return self.expression()
     
+    def mark(self, body, node):
+        # [memo] right before new func asks for its results to be cached
+        if isinstance(node, NewFunc) and body and isinstance(body[-1], AddSpecialCommentName):
+            node.memo = body[-1].content == "memo"
+        return node
+    
     def parse_name(self, error=False):
         if self.token in (tok.LITERAL, tok.IDENTIFIER):
             return str(self.eat().value)
@@ -104,12 +132,14 @@ class Parser:
             )
     
     def comment(self):
-        lc = self.line, self.col
+        pos = self.pos
         self.eat()
         n = self.parse_name()
         if self.token == tok.RSQUAREB:
             self.eat()
-            return AddSpecialCommentName(n, *lc)
+            if n is not None:
+                self.directives[n] = None
+            return AddSpecialCommentName(n, pack(pos))
         if n is None:
             while self.token != tok.RSQUAREB or self.token is None:
                 self.ignore()
@@ -119,31 +149,32 @@ class Parser:
             self.eat()
         v = self.expression()
         self.eat(tok.RSQUAREB)
-        return AddSpecialCommentKey(str(n), v, *lc)
+        self.directives[str(n)] = v
+        return AddSpecialCommentKey(str(n), v, pack(pos))
     
     def execute_comment(self):
-        lc = self.line, self.col
+        pos = self.pos
         self.eat()
-        k = self.parse_name(True)
-        if self.token == tok.COMMA:
-            k = [k]
-            while self.token == tok.COMMA:
-                self.eat()
-                k.append(self.parse_name(True))
-        return ExecuteSpecialComment(k, *lc)
+        k = [self.parse_name(True)]
+        while self.token == tok.COMMA:
+            self.eat()
+            k.append(self.parse_name(True))
+        # a directive redefined further on does not change what this exec runs
+        node = ExecuteSpecialComment(tuple(k), pack(pos), tuple(self.directives.get(n, later) for n in k))
+        if later in node.targets:
+            self.execs.append(node)
+        return node
     
     def new_var(self):
-        lc = self.line, self.col
+        pos = self.pos
         self.eat()
         name = self.eat(tok.IDENTIFIER).value
         self.eat(tok.ASSIGN)
         value = self.expression()
-        if self.line == lc[0]:
-            width = (self.col-lc[1])
-        return NewVar(name, value, *lc, width)
+        return NewVar(name, value, pack(pos, self.pos-pos))
     
     def new_func(self):
-        lc = self.line, self.col
+        pos = self.pos
         self.eat()
         self.eat()
         name = self.eat(tok.IDENTIFIER).value
@@ -157,20 +188,18 @@ class Parser:
         self.eat(tok.LCURLYB)
         body = []
         while self.token != tok.RCURLYB:
-            body.append(self.statement(accept_return=True))
+            body.append(self.mark(body, self.statement(accept_return=True)))
         self.eat(tok.RCURLYB)
-        return NewFunc(name, args, body, lc)
+        return NewFunc(name, args, body, pack(pos))
     
     def return_func(self):
-        lc = self.line, self.col
+        pos = self.pos
         self.eat()
         value = self.expression()
-        return ReturnValue(value, *lc)
+        return ReturnValue(value, pack(pos))
     
-    def function_calling(self, name):
-        lc = self.line, self.col
-        name = name
-        width = self.col-lc[1]
+    def function_calling(self, name, _=None):
+        pos = self.pos
         self.eat()
         self.eat(tok.LPAREN)
         args = []
@@ -179,61 +208,80 @@ class Parser:
             if self.token != tok.RPAREN:
                 self.eat(tok.COMMA)
         self.eat(tok.RPAREN)
-        return ObjectCall(name, args, *lc, width)
-    
-    def expression(self):
-        node = self.term()
-        while self.token in (tok.PLUS,tok.MINUS):
-            lc = self.line, self.col
-            node = BinOp(
-                node,
-                self.eat(),
-                self.term(),
-                *lc
-            )
+        self.checked = self.pos
+        return ObjectCall(name, args, pack(pos, 0))
+    
+    def expression(self, power: int=0):
+        # precedence climbing: an operand, then every operator binding tighter than power
+        token = self.token
+        prefix = self.prefix.get(token.type) if token is not None else None
+        if prefix is None:
+            self.operand_error()
+        node = prefix()
+        infix = self.infix
+        while True:
+            token = self.token
+            if token is None:
+                return node
+            rule = infix.get(token.type)
+            if rule is None or rule[0] <= power:
+                break
+            node = rule[2](node, rule[1])
+        if token.type is tok.LPAREN and self.checked != token.pos:
+            self.checked = token.pos
+            line, col = locate(self.tree.source, self.pos)
+            Y, R, _, _, RE = colors(sys.stderr)
+            sys.stderr.write(f"{R}[SyntaxWarning|{line}:{col}]{Y} Did you forgot '!'?{RE}\n")
         return node
-        
-    def term(self):
-        node = self.factor()
-        while self.token in (tok.MULT,tok.DIV,tok.DOT):
-            lc = self.line, self.col
-            node = BinOp(
-                node,
-                self.eat(),
-                self.factor(),
-                *lc
-            )
-        if self.token == tok.EXCLAMATION:
-            return self.function_calling(node)
-        if self.token == tok.LPAREN:
-            sys.stderr.write(f"{R}[SyntaxWarning|{self.line}:{self.col}]{Y} Did you forgot '!'?{RE}\n")
+    
+    def binary(self, left, power: int):
+        pos = self.pos
+        return BinOp(left, self.eat(), self.expression(power), pack(pos))
+    
+    def literal(self):
+        pos = self.pos
+        return LiteralValue(self.eat().value, pack(pos))
+    
+    def variable(self):
+        pos = self.pos
+        name = self.eat().value
+        return getVariable(name, pack(pos, len(name)))
+    
+    def unary(self):
+        # the operand is a whole expression: -1 + 2 is -(1 + 2)
+        pos = self.pos
+        return UnaryOp(self.eat(), self.expression(), pack(pos))
+    
+    def group(self):
+        self.eat()
+        node = self.expression()
+        self.eat(tok.RPAREN)
         return node
     
-    def factor(self):
-        lc = self.line, self.col
-        if self.token == tok.LITERAL:
-            return LiteralValue(self.eat().value, *lc)
-        if self.token in (tok.PLUS,tok.MINUS):
-            return UnaryOp(self.eat(), self.expression(), *lc)
-        if self.token == tok.LPAREN:
-            self.eat()
-            node = self.expression()
-            self.eat(tok.RPAREN)
-            return node
-        if self.token == tok.IDENTIFIER:
-            name = self.eat().value
-            return getVariable(name, *lc, len(name))
-        if self.token == tok.KEYWORD and self.token.value == "exec":
+    def keyword(self):
+        if self.token.value == "exec":
             return self.execute_comment()
-        t, ty = self.get_tt(
-            (tok.LITERAL, tok.PLUS, tok.MINUS, tok.LPAREN, tok.IDENTIFIER)
-        )
-        self.throw_error(
-            Error.SYNTAX,
-            f"Unexpected {t}, Expected {ty}",
-            1 if isinstance(t, str) else len(self.token.value)
-        )
+        self.operand_error()
+    
+    def operand_error(self):
+        self.expected((tok.LITERAL, tok.PLUS, tok.MINUS, tok.LPAREN, tok.IDENTIFIER), "Expected")
+    
+    def resolve(self):
+        # an exec before its directive gets the last definition, the one in place once the program ran
+        for node in self.execs:
+            for k in node.key:
+                if k not in self.directives:
+                    raise FekException(
+                        self.name, "TypeError", f"{k} is not found",
+                        node.pos, self.tree.source, no_pointer=True
+                    )
+            node.targets = tuple(
+                self.directives[k] if t is later else t for k, t in zip(node.key, node.targets))
     
-    def parse(self, tree: TokenTree):
+    def parse(self, tree: TokenTree, directives: dict=None):
+        # directives: name to expression, of this program and of the inputs before it in a session
         self.init(tree)
-        return self.start()
\ No newline at end of file
+        self.directives = {} if directives is None else directives
+        tree = self.start()
+        self.resolve()
+        return tree
\ No newline at end of file
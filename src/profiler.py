@@ -0,0 +1,105 @@
+import threading
+from collections import Counter
+from time import perf_counter
+from src.error import line_index, unpack
+
+class Profiler:
+    # calls are timed exactly through visit_ObjectCall, lines are sampled from the last visited node
+
+    def __init__(self, interpreter, interval: float=0.005) -> None:
+        self.interpreter, self.interval = interpreter, interval
+        self.functions = {} # name: [calls, self time, cumulative time]
+        self.calls = Counter() # call site offset: calls
+        self.samples = Counter() # ((name, call site), ..., current offset): seconds
+        self.stack = [] # (name, call site) of every running call
+        self.thread = None
+        self.done = threading.Event()
+
+    def install(self):
+        call = self.interpreter.visit_ObjectCall
+        functions, calls, stack = self.functions, self.calls, self.stack
+        children, active = [0.0], Counter()
+        def visit_ObjectCall(node):
+            name = getattr(node.name, "name", "<expr>")
+            site = unpack(node.pos)[0]
+            stack.append((name, site))
+            children.append(0.0)
+            active[name] += 1
+            start = perf_counter()
+            try:
+                return call(node)
+            finally:
+                elapsed = perf_counter()-start
+                stack.pop()
+                active[name] -= 1
+                stats = functions.get(name)
+                if stats is None:
+                    stats = functions[name] = [0, 0.0, 0.0]
+                stats[0] += 1
+                stats[1] += elapsed-children.pop()
+                if not active[name]:
+                    # recursive calls are already inside the outermost one
+                    stats[2] += elapsed
+                children[-1] += elapsed
+                calls[site] += 1
+        self.interpreter.visit_ObjectCall = visit_ObjectCall
+        return self
+
+    def sample(self):
+        # a sample stands for the time since the previous one, the thread may wake late
+        last = perf_counter()
+        while not self.done.wait(self.interval):
+            now = perf_counter()
+            pos = getattr(self.interpreter.last_visited_node, "pos", None)
+            if pos is not None:
+                self.samples[tuple(self.stack)+(unpack(pos)[0],)] += now-last
+            last = now
+
+    def __enter__(self):
+        self.done.clear()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self.done.set()
+        self.thread.join()
+
+    def lines(self):
+        # line: [calls, self time, cumulative time]
+        index, lines = line_index(self.interpreter.source), {}
+        def line(offset):
+            return index.locate(offset)[0]+1
+        for site, count in self.calls.items():
+            lines.setdefault(line(site), [0, 0, 0])[0] += count
+        for frames, count in self.samples.items():
+            current = line(frames[-1])
+            lines.setdefault(current, [0, 0, 0])[1] += count
+            for l in {current, *(line(site) for _, site in frames[:-1])}:
+                lines.setdefault(l, [0, 0, 0])[2] += count
+        return lines
+
+    def table(self):
+        string = f"{'function':<24}{'calls':>10}{'self(s)':>12}{'cum(s)':>12}\n"
+        for name, (calls, own, cum) in sorted(self.functions.items(), key=lambda i: -i[1][2]):
+            string += f"{name:<24}{calls:>10}{own:>12.6f}{cum:>12.6f}\n"
+        source = self.interpreter.source
+        text = (source.text() if not isinstance(source, str) else source).splitlines()
+        string += f"\n{'line':<8}{'calls':>10}{'self(s)':>12}{'cum(s)':>12}  source (times sampled every {self.interval*1000:g}ms)\n"
+        for l, (calls, own, cum) in sorted(self.lines().items(), key=lambda i: -i[1][2]):
+            code = text[l-1].strip() if 0 < l <= len(text) else ""
+            string += f"{l:<8}{calls:>10}{own:>12.3f}{cum:>12.3f}  {code}\n"
+        return string
+
+    def collapsed(self):
+        stacks = Counter()
+        for frames, count in self.samples.items():
+            stacks[";".join(["<module>", *(name for name, _ in frames[:-1])])] += count
+        # flamegraph tools want integer counts, microseconds here
+        return "".join(f"{stack} {round(count*1e6)}\n" for stack, count in sorted(stacks.items()))
+
+    def write(self, path: str):
+        with open(path+".txt", "w") as file:
+            file.write(self.table())
+        with open(path+".folded", "w") as file:
+            file.write(self.collapsed())
@@ -0,0 +1,80 @@
+from src.builtin import Rope
+from src.compiler import Compiler
+from src.fek import FekEmpty, FekVariable, RaiseAnError
+from src.lexer import Lexer
+from src.parser import Parser
+from src.vm import FekVM
+
+hosts = {} # a Python callable: its FekLang builtin, for the few most recently passed
+
+def host_function(func):
+    call = hosts.get(func)
+    if call is None:
+        if len(hosts) >= 256:
+            hosts.clear() # one atomic step, safe with other threads passing callables too
+        call = hosts[func] = wrap(func)
+    return call
+
+def wrap(func):
+    # a Python callable as a FekLang builtin, its parameters name the arguments
+    import inspect
+    names = tuple(inspect.signature(func).parameters)
+    def call(*empty, **args):
+        if empty and isinstance(empty[0], FekEmpty):
+            return names
+        r = func(*(str(v) if type(v) is Rope else v for v in args.values()))
+        try:
+            return to_fek(r)
+        except TypeError as e:
+            return RaiseAnError("TypeError", str(e)) # raised at the call, as builtins do
+    return call
+
+def to_fek(value):
+    if value is None or type(value) in (int, float, str):
+        return value
+    if isinstance(value, bool):
+        return int(value)
+    if callable(value):
+        return host_function(value)
+    raise TypeError(f"can't pass {type(value).__name__} to FekLang")
+
+def to_python(inter, value):
+    value = inter.unconvert_literal(value)
+    return str(value) if type(value) is Rope else value
+
+class Program:
+    # a program lexed and parsed once, run any number of times by any interpreter.
+    # Threads can share it as long as each of them runs it on an interpreter of its own.
+    # The only writes while running are the operator caches of BinOp nodes: each is one
+    # tuple assignment, read once into a local and checked against the operand types
+    # before use, so a thread may at worst miss the cache and look the operator up again
+
+    def __init__(self, name: str, source: str, tree) -> None:
+        self.name, self.source, self.tree = name, source, tree
+        self.code = None # bytecode for the vm engine, compiled on its first run
+
+    def compiled(self):
+        # compiling twice from two threads is harmless, both give the same code
+        if self.code is None:
+            self.code = Compiler(self.name).compile(self.tree)
+        return self.code
+
+    def run(self, inter, **values):
+        # a clean run on inter with the keywords as global variables, gives what main returns.
+        # inter.limit(fuel, seconds) bounds every run
+        inter.reset(self.name)
+        inter.source, inter.tree = self.source, self.tree
+        for name, value in values.items():
+            inter.globals.insert(FekVariable(name, to_fek(value)))
+        inter.exit_code = False
+        try:
+            return to_python(inter, inter.execute(self.compiled() if isinstance(inter, FekVM) else self.tree))
+        finally:
+            inter.exit_code = True
+
+def compile(source: str, name: str="<program>", optimize: bool=False):
+    tree = Parser(name).parse(Lexer(name).lex(source))
+    if optimize:
+        from src.optimizer import Optimizer
+        tree = Optimizer(name).optimize(tree)
+    return Program(name, source, tree)
@@ -0,0 +1,64 @@
+from src.error import FekException, unpack
+from src.token import tok
+from src.vm import FekVM
+
+class Session:
+    # an interactive session: every input runs once, on the globals the earlier ones left.
+    # main is an ordinary function here, it only runs when called
+
+    def __init__(self, inter, size: int=256) -> None:
+        self.inter, self.size = inter, size
+        self.units = {} # (generation, source): its tree, or its code for the vm, for the most recent inputs
+        self.directives = {} # every directive defined so far, an exec may name any of them
+        self.generation = 0 # counts the changes to directives, the execs of a unit are bound to one
+
+    def complete(self, text: str):
+        # False while a block, string or comment is still open at the end of text
+        try:
+            tokens = self.inter.lexer.lex(text)
+        except FekException as e:
+            return unpack(e.loc)[0] < len(text)
+        depth = 0
+        for token in tokens:
+            if token.type is tok.LCURLYB:
+                depth += 1
+            elif token.type is tok.RCURLYB:
+                depth -= 1
+        return depth <= 0
+
+    def compile(self, text: str):
+        unit = self.units.get((self.generation, text))
+        if unit is None:
+            inter = self.inter
+            directives = dict(self.directives) # kept only if the input parses
+            unit = inter.parser.parse(inter.lexer.lex(text), directives)
+            # an input that defines directives is parsed again every time, that is what redefines them
+            changed = directives.keys() != self.directives.keys() or any(
+                directives[k] is not v for k, v in self.directives.items())
+            self.directives = directives
+            if inter.optimizer is not None:
+                unit = inter.optimizer.optimize(unit)
+            if isinstance(inter, FekVM):
+                unit = inter.compiler.compile(unit)
+            if changed:
+                self.generation += 1
+                return unit
+            if len(self.units) >= self.size:
+                del self.units[next(iter(self.units))]
+            self.units[self.generation, text] = unit
+        return unit
+
+    def run(self, text: str):
+        inter = self.inter
+        unit = self.compile(text)
+        inter.source = text
+        inter.start() # every input has the whole budget
+        try:
+            if isinstance(inter, FekVM):
+                inter.run(unit)
+            else:
+                for node in unit:
+                    inter.visit(node)
+        finally:
+            inter.recursion = 0
+            inter.output.flush()
@@ -1,18 +1,29 @@
+from collections import deque
+
+token_types = {}
+
+def token_type(name: str):
+    return token_types[name]
 
 class TokenType:
     
     def __init__(self, name: str) -> None:
         self.name = name
+        token_types[name] = self
     def __repr__(self) -> str:
         return self.name
+    def __reduce__(self):
+        # token types are compared by identity, unpickle back to the same instance
+        return token_type, (self.name,)
     def __eq__(self, o: object) -> bool:
         return self is (o if not isinstance(o, Token) else o.type)
+    __hash__ = object.__hash__ # keys of the parser's tables
 
 class Token:
+    __slots__ = ("type", "value", "pos")
     
-    def __init__(self, type: TokenType, value, lc: tuple) -> None:
-        self.type, self.value = type, value
-        self.line, self.col = lc
+    def __init__(self, type: TokenType, value, pos: int) -> None:
+        self.type, self.value, self.pos = type, value, pos
     def __eq__(self, o: object) -> bool:
         return self.type == o if isinstance(o, TokenType) else self.value == o
     def __repr__(self) -> str:
@@ -40,6 +51,74 @@ class TokenTree:
     def __iter__(self):
         return self.tokens.__iter__()
 
+class TokenStream(TokenTree):
+    # pulls tokens from a generator, only the few the parser looks ahead at are kept
+    
+    def __init__(self, source, tokens) -> None:
+        self.stream, self.buffer = tokens, deque()
+        self.pos, self.token = -1, None
+        self.source = source
+    
+    def __repr__(self):
+        return "TokenStream:\n\t"+'\n\t'.join(map(str, self.buffer))
+    
+    def fill(self, size: int):
+        buffer = self.buffer
+        while len(buffer) < size:
+            token = next(self.stream, None)
+            if token is None:
+                return False
+            buffer.append(token)
+        return True
+    
+    def next(self, step:int=1):
+        self.pos += step
+        if self.fill(step):
+            for _ in range(step-1):
+                self.buffer.popleft()
+            self.token = self.buffer.popleft()
+        else:
+            self.buffer.clear()
+            self.token = None
+        return self.token
+    
+    def peek(self, step:int=1):
+        if step <= 0:
+            return self.token if step == 0 else None
+        return self.buffer[step-1] if self.fill(step) else None
+    
+    def __iter__(self):
+        while self.next() is not None:
+            yield self.token
+
+class StreamSource:
+    # a source file read in chunks, the text is only read again when an error needs a line of it
+    
+    def __init__(self, file, chunk_size: int=1 << 16) -> None:
+        self.file, self.chunk_size = file, chunk_size
+        if file.seekable():
+            self.start, self.spool = file.tell(), None
+        else:
+            import tempfile # only unseekable input (a pipe) is spooled
+            self.start, self.spool = 0, tempfile.TemporaryFile("w+", encoding="utf-8")
+    
+    def read(self, size: int):
+        chunk = self.file.read(size)
+        if self.spool is not None:
+            self.spool.write(chunk)
+        return chunk
+    
+    def text(self):
+        file = self.file if self.spool is None else self.spool
+        pos = file.tell()
+        file.seek(self.start)
+        text = file.read()
+        file.seek(pos)
+        return text
+    
+    def splitlines(self):
+        return self.text().splitlines()
+
 class tok:
     LITERAL=TokenType("literal") # 'hello' 1 1.0
     LPAREN,RPAREN=TokenType("left parentheses"),TokenType("right parentheses") # ()
@@ -0,0 +1,268 @@
+from src.compiler import Code, Compiler, last, op
+from src.fek import FekEmpty, FekObject, FekVariable, RaiseAnError
+from src.interpreter import FekInterpreter, is_function
+from src.builtin import type_name
+from src.error import colors, locate, unpack
+from src.output import Output
+from src.memo import missing
+from src.nodes import ObjectCall
+from src.heap import SCOPE, SLOT, heaped, size
+import sys
+
+unset = FekEmpty() # frame slot not bound yet
+
+class FekVM(FekInterpreter):
+
+    def __init__(self, name: str, output: Output=None) -> None:
+        super().__init__(name, output)
+        self.compiler = Compiler(name)
+        self.tail_calls = False
+        self.returned = None # what the tree walker would have visited last in the latest call
+
+    def reset(self, name: str=None):
+        super().reset(name)
+        if name is not None:
+            self.compiler.name = name
+
+    def execute(self, tree):
+        # a Code is a program compiled ahead of time, see Program
+        self.start()
+        try:
+            return self.run_module(tree if isinstance(tree, Code) else self.compiler.compile(tree))
+        finally:
+            self.output.flush()
+
+    def run_module(self, code: Code):
+        self.run(code)
+        if "main" in self.scope:
+            func = self.scope.get("main").value.scope
+            body: Code = func.get("__call__")(func).as_global
+            r = self.run(body)
+            if body.ret is None:
+                return 0
+            if self.exit_code and type_name(r) != "integer":
+                self.throw_error(
+                    body.ret, "ExitCodeError",
+                    "Expected integer", True
+                )
+            return self.unconvert_literal(r)
+
+    def prepare(self, node, obj, args: list):
+        # builtins and cached results give (None, result, None), functions give
+        # (code, new frame, (memo, key) when the result should be cached)
+        self.recursion += 1
+        if self.recursion == self.recursion_max:
+            line, col = locate(self.source, unpack(node.pos)[0])
+            self.output.flush()
+            Y, R, _, _, RE = colors(sys.stderr)
+            sys.stderr.write(
+                f'{R}[RecursionWarning|{line}:{col}]{Y} Recursion reached {self.recursion_max} {RE}\n')
+            self.throw_error(
+                node, "RecursionError", "Reached limit"
+            )
+        if is_function(obj):
+            args_name = obj(FekEmpty())
+            len_a, len_n = len(args), len(args_name)
+            if len_a < len_n:
+                self.throw_error(
+                    node.name, "TypeError",
+                    f"Missing argument: ({', '.join(args_name[len_a:])})"
+                )
+            r = obj(**dict(zip(args_name, map(self.unconvert_literal, args))))
+            if isinstance(r, RaiseAnError):
+                self.throw_error(
+                    node, r.error, r.msg
+                )
+            r = self.convert_literal(r)
+            self.recursion -= 1
+            return None, r, None
+        if not isinstance(obj, FekObject):
+            self.throw_error(
+                node, "TypeError", f"{obj} is not callable.", True
+            )
+        func = obj.scope
+        call, args_name = func.get("__call__"), func.get("__args__")
+        if args_name is None:
+            self.throw_error(
+                node, "TypeError", f"{obj.name} is not callable.", True
+            )
+        len_a, len_n = len(args), len(args_name)
+        if len_a < len_n:
+            self.throw_error(
+                node, "TypeError",
+                f"Missing argument: ({', '.join(args_name[len_a:])})"
+            )
+        body: Code = call(func)
+        memo, key = func.get("__memo__"), None
+        if memo is not None:
+            key = memo.key(args[:len_n])
+            if key is not None:
+                r = memo.get(key)
+                if r is not missing:
+                    self.recursion -= 1
+                    return None, r, None
+        frame, slots, memory = [unset]*len(body.varnames), body.slots, self.scope.memory
+        for name, value in zip(args_name, args):
+            # as in the tree walker, a global shadows an argument of the same name
+            var = memory.get(name)
+            frame[slots[name]] = value if var is None else var.value
+        self.allocate(node, SCOPE+SLOT*len(frame))
+        if self.metered:
+            self.spend(node, len(body.ops)//2) # a body runs straight through, charged up front
+        return body, frame, None if key is None else (memo, key)
+
+    def origin(self, node):
+        # a call stands for the node its callee visited last, where the tree walker points
+        if type(node) is ObjectCall:
+            node = self.returned
+            if type(node) is ObjectCall: # a builtin, a cached result or an empty body
+                node = last(node.args[-1] if node.args else node.name)
+        return node
+
+    def name_error(self, node, name: str):
+        self.throw_error(node,
+            "IdentifierError",
+            f"{name} is not exist"
+        )
+
+    def run(self, code: Code, frame: list=None, owner: Code=None):
+        # owner is the code the frame belongs to, it differs from code only for directives.
+        # FekLang calls do not recurse in Python: callers are suspended on the calls list
+        owner = code if owner is None else owner
+        if self.metered and code.ops:
+            self.spend(code.nodes[0], len(code.ops)//2)
+        memory = self.scope.memory
+        # suspended callers: (code, frame, owner, stack, pc, (memo, key) of the callee, heap mark before the call)
+        calls = []
+        heap = self.heap
+        depth = self.recursion
+        ops, consts, nodes = code.ops, code.consts, code.nodes
+        stack = []
+        push, pop = stack.append, stack.pop
+        pc, end = 0, len(ops)
+        LOAD_FAST, LOAD_GLOBAL, LOAD_CONST, CALL, BINARY, POP, RETURN = \
+            op.LOAD_FAST, op.LOAD_GLOBAL, op.LOAD_CONST, op.CALL, op.BINARY, op.POP, op.RETURN
+        try:
+            while True:
+                while pc < end:
+                    o, a = ops[pc], ops[pc+1]
+                    pc += 2
+                    if o == LOAD_FAST:
+                        value = frame[a]
+                        if value is unset:
+                            var = memory.get(owner.varnames[a])
+                            if var is None:
+                                self.name_error(nodes[pc//2-1], owner.varnames[a])
+                            value = var.value
+                        push(value)
+                    elif o == LOAD_GLOBAL:
+                        var = memory.get(consts[a])
+                        if var is None:
+                            self.name_error(nodes[pc//2-1], consts[a])
+                        push(var.value)
+                    elif o == LOAD_CONST:
+                        push(consts[a])
+                    elif o == CALL:
+                        args = stack[len(stack)-a:]
+                        del stack[len(stack)-a:]
+                        mark = heap.bytes, heap.objects
+                        callee, value, entry = self.prepare(nodes[pc//2-1], pop(), args)
+                        if callee is None:
+                            self.returned = nodes[pc//2-1] # its arguments were visited last
+                            push(value)
+                            continue
+                        if self.tail_calls and entry is None and calls and owner is code and pc < end and ops[pc] == RETURN:
+                            # return f!(...): the callee takes over this frame, and its heap
+                            self.recursion -= 1
+                            heap.release(calls[-1][6])
+                            self.allocate(nodes[pc//2-1], SCOPE+sum(SLOT+size(v) for v in value))
+                        else:
+                            calls.append((code, frame, owner, stack, pc, entry, mark))
+                        code = owner = callee
+                        frame = value
+                        ops, consts, nodes = code.ops, code.consts, code.nodes
+                        stack = []
+                        push, pop = stack.append, stack.pop
+                        pc, end = 0, len(ops)
+                    elif o == BINARY:
+                        right, left = pop(), pop()
+                        cache = nodes[pc//2-1].cache
+                        if cache is not None and cache[0] is type(left) and cache[1] is type(right):
+                            value = cache[2](left, right)
+                            if not isinstance(value, RaiseAnError):
+                                push(value)
+                                continue
+                        push(self.binary_op(nodes[pc//2-1], consts[a], left, right))
+                    elif o == POP:
+                        pop()
+                    elif o == RETURN:
+                        value = pop()
+                        break
+                    elif o == op.LOAD_NAME:
+                        name, value = consts[a], unset
+                        if owner.slots is not None and name in owner.slots:
+                            value = frame[owner.slots[name]]
+                        if value is unset:
+                            var = memory.get(name)
+                            if var is None:
+                                self.name_error(nodes[pc//2-1], name)
+                            value = var.value
+                        push(value)
+                    elif o == op.DEF_FAST:
+                        if frame[a] is not unset or owner.varnames[a] in memory:
+                            self.throw_error(nodes[pc//2-1],
+                                "TypeError",
+                                f"{owner.varnames[a]} is already exist",
+                                True
+                            )
+                        frame[a] = pop()
+                    elif o == op.DEF_GLOBAL:
+                        name = consts[a]
+                        if name in memory:
+                            self.throw_error(nodes[pc//2-1],
+                                "TypeError",
+                                f"{name} is already exist",
+                                True
+                            )
+                        self.allocate(nodes[pc//2-1], SLOT, 0)
+                        memory[name] = FekVariable(name, pop())
+                    elif o == op.STORE_FAST:
+                        frame[a] = pop()
+                    elif o == op.STORE_GLOBAL:
+                        memory[consts[a]] = FekVariable(consts[a], pop())
+                    elif o == op.MAKE_FUNC:
+                        func: Code = consts[a]
+                        push(self.make_function(func.name, func.args, func, func.memo, func))
+                        self.allocate(nodes[pc//2-1], size(stack[-1])+SLOT)
+                    elif o == op.UNARY:
+                        push(self.unary_op(nodes[pc//2-1], consts[a], pop()))
+                    elif o == op.GETATTR:
+                        push(self.get_attribute(nodes[pc//2-1], pop(), consts[a]))
+                    elif o == op.EXEC:
+                        for body in consts[a]:
+                            self.run(body, frame, owner)
+                        push(self.null)
+                else:
+                    value = self.null
+                if not calls:
+                    return value
+                self.recursion -= 1
+                last = code.last
+                code, frame, owner, stack, pc, entry, mark = calls.pop()
+                if entry is not None:
+                    entry[0].put(entry[1], value)
+                heap.release(mark)
+                ops, consts, nodes = code.ops, code.consts, code.nodes
+                if type(last) is not ObjectCall:
+                    # a body that ends in a call leaves what that call visited
+                    self.returned = nodes[pc//2-1] if last is None else last
+                if type(value) in heaped:
+                    self.allocate(nodes[pc//2-1], size(value)) # the result outlives the call
+                push, pop = stack.append, stack.pop
+                end = len(ops)
+                push(value)
+        finally:
+            # an error unwinds every frame of this run at once
+            self.recursion = depth
+            if calls:
+                heap.release(calls[0][6])
@@ -0,0 +1,35 @@
+import json, os, subprocess, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src import batch
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spin = "new func spin(n){\n    return spin!(n + 1)\n}\nnew func main(){\n    return spin!(0)\n}\n"
+
+@pytest.fixture
+def scripts(tmp_path):
+    (tmp_path/"spin.fek").write_text(spin)
+    (tmp_path/"ok.fek").write_text('new func main(){\n    println!("ok")\n    return 0\n}\n')
+    return tmp_path
+
+@pytest.mark.skipif(not hasattr(batch.signal, "setitimer"), reason="no interval timers")
+@pytest.mark.parametrize("engine", batch.engines)
+def test_timeout_status(scripts, engine):
+    batch.start_worker({"engine": engine, "no-cache": "", "max-depth": "1000000000", "tail-calls": ""})
+    result = batch.run_script(str(scripts/"spin.fek"), 0.2)
+    assert (result["status"], result["exit_code"]) == ("timeout", 1)
+    assert result["error"] == {"message": "timed out after 0.2s"}
+    # the worker goes on with the next script
+    assert batch.run_script(str(scripts/"ok.fek"), 0.2)["status"] == "ok"
+
+@pytest.mark.skipif(not hasattr(batch.signal, "setitimer"), reason="no interval timers")
+def test_run_many_reports_timeouts(scripts):
+    run = subprocess.run(
+        [sys.executable, os.path.join(root, "main.py"), "run-many", str(scripts), "--no-cache",
+         "--workers=2", "--timeout=0.2", "--max-depth=1000000000"],
+        capture_output=True, text=True, cwd=root
+    )
+    report = json.loads(run.stdout)
+    assert run.returncode == 1
+    assert (report["total"], report["ok"], report["timeout"]) == (2, 1, 1)
+    assert {r["file"].endswith("spin.fek") for r in report["results"] if r["status"] == "timeout"} == {True}
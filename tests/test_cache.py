@@ -0,0 +1,59 @@
+import os, pickle, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.cache import ProgramCache
+from src.interpreter import FekInterpreter
+
+source = "new func main(){\n    return 0\n}\n"
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ProgramCache(str(tmp_path/"cache"))
+    cache.store("p.fek", source, "tree")
+    return cache
+
+@pytest.fixture
+def loads(monkeypatch):
+    # every file pickle.load is given
+    loaded, load = [], pickle.load
+    def spy(file):
+        loaded.append(file)
+        return load(file)
+    monkeypatch.setattr(pickle, "load", spy)
+    return loaded
+
+def test_own_file_is_loaded(cache, loads):
+    assert cache.load("p.fek", source) == "tree"
+    assert len(loads) == 1
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+    assert os.stat(cache.path("p.fek")).st_mode & 0o777 == 0o600
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="no file owners")
+def test_file_of_another_user_is_not_loaded(cache, loads, monkeypatch):
+    monkeypatch.setattr(os, "getuid", lambda uid=os.getuid(): uid+1)
+    assert cache.load("p.fek", source) is None
+    assert loads == []
+
+def test_writable_by_others_is_not_loaded(cache, loads):
+    os.chmod(cache.path("p.fek"), 0o666)
+    assert cache.load("p.fek", source) is None
+    os.chmod(cache.path("p.fek"), 0o600)
+    os.chmod(cache.directory, 0o777)
+    assert cache.load("p.fek", source) is None
+    assert loads == []
+
+@pytest.mark.skipif(not hasattr(os, "O_NOFOLLOW"), reason="no O_NOFOLLOW")
+def test_symlink_is_not_followed(cache, loads, tmp_path):
+    target = str(tmp_path/"elsewhere.fekc")
+    os.replace(cache.path("p.fek"), target)
+    os.symlink(target, cache.path("p.fek"))
+    assert cache.load("p.fek", source) is None
+    assert loads == []
+
+def test_refused_file_is_parsed_again(cache, loads):
+    os.chmod(cache.path("p.fek"), 0o666)
+    inter = FekInterpreter("p.fek")
+    inter.cache = cache
+    assert inter.interpret(source) == 0 # parsed from source, not the "tree" in the file
+    assert loads == []
+    assert cache.load("p.fek", source) is not None # and stored again, privately
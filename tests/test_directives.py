@@ -0,0 +1,50 @@
+import io, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.batch import engines
+from src.output import Output
+
+redefined = """[k:println!("A")]
+exec k
+[k:println!("B")]
+exec k
+new func main(){
+    [m:println!("M1")]
+    exec m
+    [m:println!("M2")]
+    exec m, k
+    return 0
+}
+"""
+
+def run(engine: str, source: str):
+    inter = engines[engine]("<test>", Output(io.StringIO()))
+    code = inter.interpret(source)
+    return code, inter.output.sink.getvalue()
+
+@pytest.mark.parametrize("engine", engines)
+def test_exec_runs_the_directive_defined_before_it(engine):
+    assert run(engine, redefined) == (0, "A\nB\nM1\nM2\nB\n")
+
+@pytest.mark.parametrize("engine", engines)
+def test_exec_before_its_directive_runs_the_last_definition(engine):
+    source = 'new func main(){\n    exec k\n    return 0\n}\n[k:println!("A")]\n[k:println!("B")]\n'
+    assert run(engine, source) == (0, "B\n")
+
+@pytest.mark.parametrize("engine", engines)
+def test_session_exec_follows_redefinitions(engine):
+    from src.session import Session
+    session = Session(engines[engine]("<test>", Output(io.StringIO())))
+    for text in ('[k:println!("A")]', "exec k", '[k:println!("B")]', "exec k", '[k:println!("A")]', "exec k"):
+        session.run(text)
+    assert session.inter.output.sink.getvalue() == "A\nB\nA\n"
+
+def test_optimized_execs_share_their_directive():
+    from src import program
+    from src.compiler import Compiler, op
+    tree = program.compile('[k:println!(1 + 2)]\nexec k\nexec k\n', optimize=True).tree
+    definition, first, second = tree.childrens
+    assert first.targets[0] is definition.value and second.targets[0] is definition.value
+    code = Compiler("<test>").compile(tree)
+    first, second = (code.consts[code.ops[i+1]] for i in range(0, len(code.ops), 2) if code.ops[i] == op.EXEC)
+    assert first[0] is second[0]
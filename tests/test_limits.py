@@ -0,0 +1,59 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src import program
+from src.batch import engines
+from src.error import FekException
+
+spin = """new func spin(n){
+    return spin!(n + 1)
+}
+new func main(){
+    return spin!(0)
+}
+"""
+
+def interpreter(engine: str):
+    inter = engines[engine]("<test>")
+    inter.recursion_max, inter.tail_calls = 10**9, True # only the limit under test stops spin
+    return inter
+
+def error(inter, source: str):
+    with pytest.raises(FekException) as e:
+        program.compile(source).run(inter)
+    return e.value.diagnostic()
+
+@pytest.mark.parametrize("engine", engines)
+def test_memory_quota(engine):
+    inter = interpreter(engine)
+    inter.heap.limit = 1 << 20
+    d = error(inter, 'new func main(){\n    def s = "abc" * 1000000\n    return 0\n}\n')
+    assert (d.code, d.line) == ("MemoryError", 2)
+    assert d.message == f"Exceeded the memory quota of {1 << 20} bytes"
+    # what main holds is given back, a smaller program still runs
+    assert program.compile('new func main(){\n    return "abc" * 1000\n}\n').run(inter) == "abc"*1000
+
+@pytest.mark.parametrize("engine", engines)
+def test_fuel(engine):
+    inter = interpreter(engine).limit(fuel=5000)
+    d = error(inter, spin)
+    assert (d.code, d.line, d.message) == ("FuelError", 2, "Ran out of fuel after 5000 steps")
+    # every run starts with a full budget
+    assert program.compile("new func main(){\n    return 1 + 2\n}\n").run(inter) == 3
+
+@pytest.mark.parametrize("engine", engines)
+def test_deadline(engine):
+    inter = interpreter(engine).limit(seconds=0.05)
+    d = error(inter, spin)
+    assert (d.code, d.line, d.message) == ("TimeoutError", 2, "Exceeded the deadline of 0.05 s")
+    assert inter.budget.steps > 0
+
+@pytest.mark.parametrize("engine", engines)
+def test_memory_quota_with_folding(engine):
+    # -O must not build the string at compile time, the quota would never see it
+    inter = interpreter(engine)
+    inter.heap.limit = 1000000
+    with pytest.raises(FekException) as e:
+        program.compile('def s = "abc" * 100000000\n', optimize=True).run(inter)
+    assert e.value.diagnostic().code == "MemoryError"
+    assert program.compile('def s = "ab" * 3\n', optimize=True).tree.childrens[0].value.value == "ababab"
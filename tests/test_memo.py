@@ -0,0 +1,26 @@
+import io, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.batch import engines
+from src.output import Output
+
+nested = """new func outer(n){
+    [memo]
+    new func square(x){
+        return x * x
+    }
+    return square!(n)
+}
+new func main(){
+    println!(outer!(3) + outer!(3) + outer!(4))
+    return 0
+}
+"""
+
+@pytest.mark.parametrize("engine", engines)
+def test_nested_memo_is_made_once(engine):
+    inter = engines[engine]("<test>", Output(io.StringIO()))
+    assert inter.interpret(nested) == 0
+    assert inter.output.sink.getvalue() == "34\n"
+    [memo] = inter.memos.values()
+    assert memo.hits == 1
@@ -0,0 +1,20 @@
+import glob, os, subprocess, sys
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+programs = sorted(glob.glob(os.path.join(root, "tests", "programs", "*.fek"))) + [
+    os.path.join(root, "design.fek"), os.path.join(root, "test.fek")
+]
+
+def run(path: str, *flags):
+    # what a user sees: output, warnings and exit code
+    r = subprocess.run(
+        [sys.executable, os.path.join(root, "main.py"), "--no-cache", *flags, path],
+        capture_output=True, text=True, stdin=subprocess.DEVNULL, cwd=root
+    )
+    return r.returncode, r.stdout, r.stderr
+
+@pytest.mark.parametrize("flags", [("--engine=vm",), ("-O",), ("--stream",), ("--engine=vm", "-O")])
+@pytest.mark.parametrize("path", programs, ids=os.path.basename)
+def test_same_as_the_tree_engine(path, flags):
+    assert run(path, *flags) == run(path)
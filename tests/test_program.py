@@ -0,0 +1,19 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src import program
+from src.batch import engines
+from src.error import FekException
+
+@pytest.mark.parametrize("engine", engines)
+def test_run_with_host_values(engine):
+    p = program.compile("new func main(){\n    return price * qty + size!(name)\n}\n")
+    assert p.run(engines[engine]("<test>"), price=3, qty=2, name="fek", size=len) == 9
+
+@pytest.mark.parametrize("engine", engines)
+def test_unsupported_host_result_is_a_fek_error(engine):
+    p = program.compile("new func main(){\n    return host!(1)\n}\n")
+    with pytest.raises(FekException) as e:
+        p.run(engines[engine]("<test>"), host=lambda x: [x])
+    d = e.value.diagnostic()
+    assert (d.code, d.line, d.message) == ("TypeError", 2, "can't pass list to FekLang")
@@ -0,0 +1,30 @@
+import io, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.batch import engines
+from src.builtin import Rope
+from src.output import Output
+
+def test_extending_an_older_rope_again():
+    base = Rope(["a"], 1)
+    first = base.append("b")
+    second = base.append("c") # copies, first keeps the shared parts
+    assert (str(first), str(second), str(base)) == ("ab", "ac", "a")
+    longer = first.append("d")
+    again = first.append("e")
+    assert (str(longer), str(again), str(first)) == ("abd", "abe", "ab")
+    assert (len(longer), len(again)) == (3, 3)
+
+@pytest.mark.parametrize("engine", engines)
+def test_strings_grown_from_one_stay_apart(engine):
+    source = (
+        'def base = "a" + "b"\n'
+        'def first = base + "c"\n'
+        'def second = base + "d"\n'
+        'def third = first + "e"\n'
+        'def fourth = first + "f"\n'
+        'println!(base)\nprintln!(first)\nprintln!(second)\nprintln!(third)\nprintln!(fourth)\n'
+    )
+    inter = engines[engine]("<test>", Output(io.StringIO()))
+    inter.interpret(source)
+    assert inter.output.sink.getvalue() == "ab\nabc\nabd\nabce\nabcf\n"
@@ -0,0 +1,35 @@
+import io, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.batch import engines
+from src.output import Output
+from src.session import Session
+
+def session(engine: str):
+    return Session(engines[engine]("<test>", Output(io.StringIO())))
+
+@pytest.mark.parametrize("engine", engines)
+def test_runs_only_the_new_input(engine):
+    s = session(engine)
+    for text in (
+        'new func main(){\n    println!("main")\n    return 0\n}',
+        'println!("once")', "def x = 2", "println!(x)", "main!()"
+    ):
+        s.run(text)
+    # main only runs when called, and no input runs twice
+    assert s.inter.output.sink.getvalue() == "once\n2\nmain\n"
+
+@pytest.mark.parametrize("engine", engines)
+def test_same_input_runs_again(engine):
+    s = session(engine)
+    for text in ("def n = 1", 'println!("hi")', 'println!("hi")'):
+        s.run(text)
+    assert s.inter.output.sink.getvalue() == "hi\nhi\n"
+
+def test_complete():
+    s = session("tree")
+    assert s.complete("def x = 1")
+    assert not s.complete("new func f(a){")
+    assert s.complete("new func f(a){\n    return a\n}")
+    assert not s.complete('println!("open')
+    assert not s.complete("/* still")